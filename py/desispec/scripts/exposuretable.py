@@ -11,7 +11,7 @@ from astropy.table import Table
 from astropy.io import fits
 ## Import some helper functions, you can see their definitions by uncomenting the bash shell command
 from desispec.io.util import parse_cameras, difference_camwords, validate_badamps
-from desispec.workflow.exptable import summarize_exposure, default_obstypes_for_exptable, \
+from desispec.workflow.exptable import summarize_night, default_obstypes_for_exptable, \
                                        instantiate_exposure_table, get_exposure_table_column_defs, \
                                        get_exposure_table_path, get_exposure_table_name, \
                                        night_to_month
@@ -22,7 +22,7 @@ from desispec.workflow.tableio import write_table
 
 def create_exposure_tables(nights=None, night_range=None, path_to_data=None, exp_table_path=None, obstypes=None, \
                            exp_filetype='csv', cameras=None, bad_cameras=None, badamps=None,
-                           verbose=False, no_specprod=False, overwrite_files=False):
+                           verbose=False, no_specprod=False, overwrite_files=False, nworkers=1):
     """
     Generates processing tables for the nights requested. Requires exposure tables to exist on disk.
 
@@ -47,6 +47,8 @@ def create_exposure_tables(nights=None, night_range=None, path_to_data=None, exp
         badamps: str. Define amplifiers that you know to be bad and should not be processed. Should be a list separated
                       by comma or semicolon. Saved list will converted to semicolons. Each entry should be of the
                       form {camera}{spectrograph}{amp}, i.e. [brz][0-9][A-D].
+        nworkers: int. Number of threads used to summarize the exposures of each night. Default is 1, which
+                       summarizes them serially.
     Returns: Nothing
     """
     if nights is None and night_range is None:
@@ -138,22 +140,23 @@ def create_exposure_tables(nights=None, night_range=None, path_to_data=None, exp
 
         print(get_printable_banner(input_str=night))
 
-        ## Create an astropy exposure table for the night
-        nightly_tab = instantiate_exposure_table()
-
-        ## Loop through all exposures on disk
-        for exp in listpath(path_to_data,str(night)):
-            rowdict = summarize_exposure(path_to_data, night=night, exp=exp, obstypes=obstypes, \
-                                         colnames=colnames, coldefaults=coldefaults, verbosely=verbose)
+        ## Summarize all exposures on disk, collecting the rows for the night
+        ## The table is built once at the end rather than growing it one row at a time
+        nightly_rows = []
+        rowdicts = summarize_night(path_to_data, night, obstypes=obstypes, colnames=colnames,
+                                   coldefaults=coldefaults, verbosely=verbose, max_workers=nworkers)
+        for rowdict in rowdicts:
             if rowdict is not None and type(rowdict) is not str:
                 rowdict['BADCAMWORD'] = badcamword
                 rowdict['BADAMPS'] = badamps
                 ## Add the dictionary of column values as a new row
-                nightly_tab.add_row(rowdict)
+                nightly_rows.append(rowdict)
             if verbose:
                 print("Rowdict:\n",rowdict,"\n\n")
 
-        if len(nightly_tab) > 0:
+        if len(nightly_rows) > 0:
+            ## Create an astropy exposure table for the night
+            nightly_tab = instantiate_exposure_table(rows=nightly_rows)
             month = night_to_month(night)
             exptab_path = pathjoin(exp_table_path,month)
             os.makedirs(exptab_path,exist_ok=True)
@@ -9,6 +9,7 @@ import os
 import sys
 import time
 import re
+from desiutil.log import get_logger
 ## Import some helper functions, you can see their definitions by uncomenting the bash shell command
 from desispec.workflow.utils import verify_variable_with_environment, listpath
 from desispec.scripts.submit_night import submit_night
@@ -21,18 +22,57 @@ def assign_survey(night, conf):
     dictionary, if psosible. Otherwise returns None.
 
     Args:
-        night (int): The night you want to know the survey it corresponds to.
+        night (int or str): The night you want to know the survey it corresponds to.
         conf (dict): Dictionary that returned when the configuration yaml file was read in.
 
     Returns:
         survey, str. The survey the night was taken under, according to the conf file.
     """
-    for survey in conf['DateRanges']:
-        first, last = conf['DateRanges'][survey]
-        if night >= first and night <= last:
-            return survey
-    else:
-        return None
+    return assign_surveys([night], conf)[0]
+
+
+def assign_surveys(nights, conf):
+    """
+    Vectorized version of assign_survey. Takes a desi production configuration (yaml) dictionary
+    and determines the survey corresponding to each of the given nights using a single binary search
+    over the date ranges in conf['DateRanges']. If date ranges overlap, a warning is logged and each
+    night is assigned to the first matching survey in conf['DateRanges'] order, as in assign_survey.
+
+    Args:
+        nights (list or np.array of int or str): The nights you want to know the surveys of.
+        conf (dict): Dictionary that returned when the configuration yaml file was read in.
+
+    Returns:
+        surveys, np.array. Object array of the same length as nights with the survey each night was
+        taken under, according to the conf file, or None if the night isn't in any of the date ranges.
+    """
+    nights = np.atleast_1d(nights).astype(int)
+    surveys = np.array(list(conf['DateRanges'].keys()), dtype=object)
+    ranges = np.array([conf['DateRanges'][survey] for survey in surveys], dtype=int).reshape(-1, 2)
+    out = np.full(len(nights), None, dtype=object)
+
+    ## Sort the ranges by their first night so we can binary search for the last range starting on or before each night
+    order = np.argsort(ranges[:, 0], kind='stable')
+    firsts, lasts = ranges[order, 0], ranges[order, 1]
+
+    ## The binary search needs disjoint ranges, so fall back to the first match in conf order if they overlap
+    if np.any(firsts[1:] <= lasts[:-1]):
+        log = get_logger()
+        log.warning(f"Overlapping survey DateRanges in conf: {conf['DateRanges']}. Nights in more than one "
+                    + "range are assigned to the first matching survey.")
+        inrange = (nights[:, None] >= ranges[None, :, 0]) & (nights[:, None] <= ranges[None, :, 1])
+        matched = np.any(inrange, axis=1)
+        out[matched] = surveys[np.argmax(inrange[matched], axis=1)]
+        return out
+
+    idx = np.searchsorted(firsts, nights, side='right') - 1
+
+    ## Only keep matches where the night is also on or before the end of that range
+    valid = (idx >= 0)
+    valid[valid] = (nights[valid] <= lasts[idx[valid]])
+
+    out[valid] = surveys[order][idx[valid]]
+    return out
 
 
 def get_all_nights():
@@ -93,9 +133,9 @@ def submit_production(production_yaml, dry_run=False, error_if_not_available=Fal
         print("Ignoring the fact that files exists and submitting those nights anyway")
 
     all_nights = get_all_nights()
+    all_surveys = assign_surveys(all_nights, conf)
     non_survey_nights = []
-    for night in all_nights:
-        survey = assign_survey(night, conf)
+    for night, survey in zip(all_nights, all_surveys):
         if survey is None:
             non_survey_nights.append(night)
             continue
@@ -0,0 +1,78 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+# -*- coding: utf-8 -*-
+"""Test desispec.scripts.submit_prod
+"""
+
+import unittest
+import numpy as np
+from desispec.scripts.submit_prod import assign_survey, assign_surveys
+
+class TestSubmitProd(unittest.TestCase):
+    """Test desispec.scripts.submit_prod
+    """
+
+    def setUp(self):
+        ## deliberately not in night order, with gaps between the ranges
+        self.conf = {'DateRanges': {'main': [20210514, 20220613],
+                                    'sv1': [20201201, 20210330],
+                                    'sv3': [20210405, 20210513],
+                                    'special': [20220701, 20220701]}}
+
+    def _loop_survey(self, night, conf):
+        """
+        Survey assignment by looping over the date ranges in conf order, as assign_survey originally did
+        """
+        for survey in conf['DateRanges']:
+            first, last = conf['DateRanges'][survey]
+            if night >= first and night <= last:
+                return survey
+        return None
+
+    def test_boundaries_and_gaps(self):
+        """Test nights on the first and last night of each range and nights in the gaps"""
+        expected = {20201130: None, 20201201: 'sv1', 20210330: 'sv1', 20210331: None,
+                    20210404: None, 20210405: 'sv3', 20210513: 'sv3', 20210514: 'main',
+                    20220613: 'main', 20220614: None, 20220630: None, 20220701: 'special',
+                    20220702: None}
+        nights = list(expected.keys())
+        surveys = assign_surveys(nights, self.conf)
+        self.assertEqual(list(surveys), list(expected.values()))
+        self.assertEqual(list(surveys), [self._loop_survey(night, self.conf) for night in nights])
+        for night, survey in expected.items():
+            self.assertEqual(assign_survey(night, self.conf), survey)
+
+    def test_string_nights(self):
+        """Test that nights given as strings give the same surveys as ints"""
+        nights = [20201201, 20210331, 20210513, 20220613]
+        self.assertEqual(list(assign_surveys([str(night) for night in nights], self.conf)),
+                         list(assign_surveys(nights, self.conf)))
+        self.assertEqual(list(assign_surveys(np.array(nights).astype(str), self.conf)),
+                         ['sv1', None, 'sv3', 'main'])
+        self.assertEqual(assign_survey('20210405', self.conf), 'sv3')
+        self.assertEqual(assign_survey(np.int64(20210405), self.conf), 'sv3')
+
+    def test_empty(self):
+        """Test no nights and no date ranges"""
+        self.assertEqual(len(assign_surveys([], self.conf)), 0)
+        self.assertIsNone(assign_survey(20210405, {'DateRanges': {}}))
+
+    def test_overlapping_ranges(self):
+        """Test that overlapping ranges give the first matching survey in conf order"""
+        conf = {'DateRanges': {'main': [20210514, 20220613],
+                               'sv1': [20201201, 20210330],
+                               'extended': [20210301, 20210601]}}
+        nights = [20201130, 20210301, 20210330, 20210331, 20210514, 20210601, 20210602]
+        surveys = assign_surveys(nights, conf)
+        self.assertEqual(list(surveys), [self._loop_survey(night, conf) for night in nights])
+        self.assertEqual(list(surveys), [None, 'sv1', 'sv1', 'extended', 'main', 'main', 'main'])
+
+def test_suite():
+    """Allows testing of only this module with the command::
+
+        python setup.py test -m <modulename>
+    """
+    return unittest.defaultTestLoader.loadTestsFromName(__name__)
+
+#- run all unit tests in this file
+if __name__ == '__main__':
+    unittest.main()
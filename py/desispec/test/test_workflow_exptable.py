@@ -0,0 +1,102 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+# -*- coding: utf-8 -*-
+"""Test desispec.workflow.exptable
+"""
+
+import time
+import unittest
+from unittest.mock import patch
+import numpy as np
+from desispec.workflow import exptable
+from desispec.workflow.exptable import get_exposure_table_column_defs, \
+                                       instantiate_exposure_table, summarize_night
+
+class TestExposureTable(unittest.TestCase):
+    """Test desispec.workflow.exptable
+    """
+
+    def _default_row(self, expid):
+        """
+        Create an exposure table row dictionary filled with the default values
+        """
+        colnames, coltypes, coldefs = get_exposure_table_column_defs(return_default_values=True)
+        row = dict(zip(colnames, coldefs))
+        row['EXPID'] = expid
+        return row
+
+    def test_instantiate_rows(self):
+        """Test that rows are inserted with the default column types"""
+        rows = [self._default_row(1), self._default_row(2)]
+        rows[1]['HEADERERR'] = np.array(['PROGRAM:a->b'])
+        table = instantiate_exposure_table(rows=rows)
+        self.assertEqual(len(table), 2)
+        self.assertEqual(list(table['EXPID']), [1, 2])
+        self.assertEqual(table['OBSTYPE'].dtype, np.dtype('S8'))
+        self.assertEqual(table['HEADERERR'].shape, (2,))
+        self.assertEqual(list(table['HEADERERR'][1]), ['PROGRAM:a->b'])
+
+    def test_instantiate_overwidth_string(self):
+        """Test that strings longer than the default column width aren't truncated"""
+        program = 'p' * 80
+        rows = [self._default_row(1), self._default_row(2)]
+        rows[0]['PROGRAM'] = program
+        table = instantiate_exposure_table(rows=rows)
+        self.assertEqual(table['PROGRAM'].dtype, np.dtype('S80'))
+        self.assertEqual(table['PROGRAM'][0], program)
+        self.assertEqual(table['PROGRAM'][1], 'unknown')
+
+    def test_instantiate_missing_column(self):
+        """Test that rows missing a column are still inserted"""
+        rows = [self._default_row(1), self._default_row(2)]
+        del rows[1]['PURPOSE']
+        table = instantiate_exposure_table(rows=rows)
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table['PURPOSE'][0], 'unknown')
+
+    def test_instantiate_empty(self):
+        """Test that no rows gives an empty table with the default column types"""
+        for rows in (None, []):
+            table = instantiate_exposure_table(rows=rows)
+            self.assertEqual(len(table), 0)
+            self.assertEqual(table['PROGRAM'].dtype, np.dtype('S60'))
+
+    def test_summarize_night_matches_serial(self):
+        """Test that summarizing a night with threads gives the same rows in the same order as serially"""
+        exps = [f'{expid:08d}' for expid in range(100, 112)]
+
+        def fake_summarize(raw_data_dir, night, exp, obstypes=None, colnames=None,
+                           coldefaults=None, verbosely=False):
+            ## earlier exposures finish last so that threads complete out of order
+            time.sleep(0.001 * (112 - int(exp)))
+            if int(exp) % 5 == 0:
+                return None
+            elif int(exp) % 7 == 0:
+                return 'endofarcs'
+            row = self._default_row(int(exp))
+            row['NIGHT'] = int(night)
+            return row
+
+        with patch.object(exptable, 'summarize_exposure', side_effect=fake_summarize):
+            serial = summarize_night('/fake/data', 20210101, exps=exps)
+            threaded = summarize_night('/fake/data', 20210101, exps=exps, max_workers=4)
+
+        self.assertEqual(len(serial), len(exps))
+        self.assertEqual(len(threaded), len(exps))
+        for srow, trow in zip(serial, threaded):
+            if isinstance(srow, dict):
+                self.assertEqual(srow['EXPID'], trow['EXPID'])
+                self.assertEqual(srow['NIGHT'], trow['NIGHT'])
+            else:
+                self.assertEqual(srow, trow)
+        self.assertEqual(summarize_night('/fake/data', 20210101, exps=[], max_workers=4), [])
+
+def test_suite():
+    """Allows testing of only this module with the command::
+
+        python setup.py test -m <modulename>
+    """
+    return unittest.defaultTestLoader.loadTestsFromName(__name__)
+
+#- run all unit tests in this file
+if __name__ == '__main__':
+    unittest.main()
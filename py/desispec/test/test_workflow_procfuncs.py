@@ -0,0 +1,254 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+# -*- coding: utf-8 -*-
+"""Test desispec.workflow.procfuncs
+"""
+
+import unittest
+from unittest.mock import patch
+import numpy as np
+from desispec.workflow import procfuncs
+from desispec.workflow.exptable import get_exposure_table_column_defs, instantiate_exposure_table
+from desispec.workflow.proctable import default_prow, instantiate_processing_table
+
+class TestProcFuncs(unittest.TestCase):
+    """Test desispec.workflow.procfuncs
+    """
+
+    def _ptable(self, statuses):
+        """
+        Create a processing table with one independent job per input status
+        """
+        rows = []
+        for intid, status in enumerate(statuses):
+            prow = default_prow()
+            prow['INTID'] = intid
+            prow['LATEST_QID'] = 100 + intid
+            prow['STATUS'] = status
+            rows.append(prow)
+        return instantiate_processing_table(rows=rows)
+
+    def test_resubmit_status_change_midloop(self):
+        """Test that rows moved into a resubmission state during the loop are still resubmitted"""
+        ptable = self._ptable(['FAILED', 'COMPLETED', 'COMPLETED', 'TIMEOUT'])
+        resubmitted = []
+
+        def fake_resubmit(rown, proc_table, submits, *args, **kwargs):
+            resubmitted.append(rown)
+            proc_table['STATUS'][rown] = 'SUBMITTED'
+            if len(resubmitted) == 1:
+                ## mimic a queue refresh that finds jobs which have failed since the loop started
+                proc_table['STATUS'][0] = 'FAILED'
+                proc_table['STATUS'][2] = 'FAILED'
+            return proc_table, submits + 1
+
+        with patch.object(procfuncs, 'update_from_queue', side_effect=lambda ptab, **kw: ptab), \
+             patch.object(procfuncs, 'recursive_submit_failed', side_effect=fake_resubmit):
+            ptable, submits = procfuncs.update_and_recurvsively_submit(
+                ptable, resubmission_states=['FAILED', 'TIMEOUT'], dry_run=2)
+
+        ## rows are visited in order, so row 0 isn't revisited after being resubmitted
+        self.assertEqual(resubmitted, [0, 2, 3])
+        self.assertEqual(submits, 3)
+        self.assertEqual(list(ptable['STATUS']), ['FAILED', 'COMPLETED', 'SUBMITTED', 'SUBMITTED'])
+
+    def test_dependency_string(self):
+        """Test the sbatch dependency argument for the supported forms of dependency qids"""
+        cases = [(12345, '--dependency=afterok:12345'),
+                 (np.int64(12345), '--dependency=afterok:12345'),
+                 (' 12345 ', '--dependency=afterok:12345'),
+                 ([5], '--dependency=afterok:5'),
+                 ([5, 6, 7], '--dependency=afterok:5:6:7'),
+                 (np.array([5, 6]), '--dependency=afterok:5:6'),
+                 ([5, 0, 6], '--dependency=afterok:5:6'),
+                 ([5, None], '--dependency=afterok:5'),
+                 ([0], ''),
+                 ([None], ''),
+                 ([], ''),
+                 (np.empty(0, dtype=int), '')]
+        for dep_qids, expected in cases:
+            self.assertEqual(procfuncs._dependency_string(dep_qids, 'afterok'), expected,
+                             msg=f'dep_qids={dep_qids!r}')
+        self.assertEqual(procfuncs._dependency_string([5, 6], 'afterany'),
+                         '--dependency=afterany:5:6')
+
+    def _assert_deps(self, prow, intids, qids):
+        """
+        Check the dependency columns of a processing row
+        """
+        self.assertEqual(list(prow['INT_DEP_IDS']), intids)
+        self.assertEqual(list(prow['LATEST_DEP_QID']), qids)
+        self.assertTrue(np.issubdtype(np.asarray(prow['INT_DEP_IDS']).dtype, np.integer))
+        self.assertTrue(np.issubdtype(np.asarray(prow['LATEST_DEP_QID']).dtype, np.integer))
+
+    def test_assign_dependency(self):
+        """Test assign_dependency for each of the supported dependency types"""
+        ## row 1 is completed and row 3 was never submitted, so neither is still a dependency
+        ptable = self._ptable(['SUBMITTED', 'COMPLETED', 'PENDING', 'FAILED'])
+        ptable['LATEST_QID'][3] = -99
+        deprows = [dict(zip(ptable.colnames, row)) for row in ptable]
+        deparray = np.empty(len(deprows), dtype=object)
+        deparray[:] = deprows
+
+        for dependency in (deprows, tuple(deprows), deparray, [ptable[i] for i in range(len(ptable))]):
+            prow = procfuncs.assign_dependency(default_prow(), dependency)
+            self._assert_deps(prow, [0, 2], [100, 102])
+
+        for dependency in (deprows[2], ptable[2]):
+            prow = procfuncs.assign_dependency(default_prow(), dependency)
+            self._assert_deps(prow, [2], [102])
+
+        for dependency in (None, [], deprows[1], ptable[1], ptable[3]):
+            prow = procfuncs.assign_dependency(default_prow(), dependency)
+            self._assert_deps(prow, [], [])
+
+        ## previous dependencies are replaced rather than appended to
+        prow = procfuncs.assign_dependency(default_prow(), deprows[0])
+        prow = procfuncs.assign_dependency(prow, None)
+        self._assert_deps(prow, [], [])
+
+    def _calib_tables(self, prows, erows):
+        """
+        Create processing and exposure tables from (INTID, OBSTYPE, JOBDESC, EXPID) and
+        (EXPID, OBSTYPE, SEQNUM, SEQTOT, EXPTIME) tuples
+        """
+        ptable_rows = []
+        for intid, obstype, jobdesc, expid in prows:
+            prow = default_prow()
+            prow.update({'INTID': intid, 'OBSTYPE': obstype, 'JOBDESC': jobdesc,
+                         'EXPID': np.array([expid]), 'LATEST_QID': 1000 + intid, 'STATUS': 'COMPLETED'})
+            ptable_rows.append(prow)
+        colnames, coltypes, coldefs = get_exposure_table_column_defs(return_default_values=True)
+        etable_rows = []
+        for expid, obstype, seqnum, seqtot, exptime in erows:
+            erow = dict(zip(colnames, coldefs))
+            erow.update({'EXPID': expid, 'OBSTYPE': obstype, 'SEQNUM': seqnum,
+                         'SEQTOT': seqtot, 'EXPTIME': exptime})
+            etable_rows.append(erow)
+        return instantiate_processing_table(rows=ptable_rows), instantiate_exposure_table(rows=etable_rows)
+
+    def _old_parse(self, etable, ptable):
+        """
+        INTID's of the calibration jobs, arcs and flats as located by the original column-scanning
+        loops of parse_previous_tables
+        """
+        jobtypes = ptable['JOBDESC']
+        lasttype = str(ptable['OBSTYPE'][-1]).lower()
+        calibjobs = {}
+        for jobtype in ['nightlybias', 'ccdcalib', 'psfnight', 'nightlyflat']:
+            if jobtype in jobtypes:
+                calibjobs[jobtype] = ptable[jobtypes == jobtype][0]['INTID']
+            else:
+                calibjobs[jobtype] = None
+        arcs, flats = [], []
+        if 'psfnight' not in jobtypes and lasttype == 'arc':
+            seqnum = 10
+            for row in ptable[::-1]:
+                erow = etable[etable['EXPID'] == row['EXPID'][0]]
+                if row['OBSTYPE'].lower() == 'arc' and int(erow['SEQNUM'][0]) < seqnum:
+                    arcs.append(row['INTID'])
+                    seqnum = int(erow['SEQNUM'][0])
+                else:
+                    break
+        if 'nightlyflat' not in jobtypes and lasttype == 'flat':
+            for row in ptable[::-1]:
+                erow = etable[etable['EXPID'] == row['EXPID'][0]]
+                if row['OBSTYPE'].lower() == 'flat' and int(erow['SEQTOT'][0]) < 5:
+                    if float(erow['EXPTIME'][0]) > 100.:
+                        flats.append(row['INTID'])
+                else:
+                    break
+        return calibjobs, arcs[::-1], flats[::-1]
+
+    def _new_parse(self, etable, ptable):
+        """
+        INTID's of the calibration jobs, arcs and flats as located by parse_previous_tables
+        """
+        arcs, flats, sciences, calibjobs, curtype, lasttype, curtile, lasttile, internal_id \
+            = procfuncs.parse_previous_tables(etable, ptable, 20210101)
+        calibjobs = {key: (None if job is None else job['INTID']) for key, job in calibjobs.items()
+                     if key != 'badcol'}
+        return calibjobs, [arc['INTID'] for arc in arcs], [flat['INTID'] for flat in flats]
+
+    def test_parse_previous_tables(self):
+        """Test that parse_previous_tables finds the same jobs as the original loops"""
+        cases = {
+            ## repeated calibration jobs, where the first of each type should be used
+            'duplicate_jobdesc': (
+                [(1, 'zero', 'nightlybias', 1), (2, 'dark', 'ccdcalib', 2), (3, 'dark', 'ccdcalib', 2),
+                 (4, 'arc', 'arc', 3), (5, 'arc', 'psfnight', 3), (6, 'arc', 'psfnight', 3),
+                 (7, 'flat', 'flat', 4), (8, 'flat', 'nightlyflat', 4), (9, 'flat', 'nightlyflat', 4),
+                 (10, 'science', 'prestdstar', 5)],
+                [(1, 'zero', 1, 1, 0.), (2, 'dark', 1, 1, 300.), (3, 'arc', 1, 5, 5.),
+                 (4, 'flat', 1, 3, 120.), (5, 'science', 1, 1, 900.)]),
+            ## two arc sequences, where only the last one should be used
+            'arc_sequences': (
+                [(1, 'dark', 'ccdcalib', 1)] + [(i, 'arc', 'arc', i) for i in range(2, 9)],
+                [(1, 'dark', 1, 1, 300.)] + [(i, 'arc', seq, 5, 5.)
+                                             for i, seq in zip(range(2, 9), [1, 2, 3, 4, 1, 2, 3])]),
+            ## a flat sequence with a short flat, preceded by arcs
+            'flat_sequence': (
+                [(1, 'arc', 'arc', 1), (2, 'arc', 'arc', 2)] + [(i, 'flat', 'flat', i) for i in range(3, 7)],
+                [(1, 'arc', 1, 5, 5.), (2, 'arc', 2, 5, 5.), (3, 'flat', 1, 4, 120.),
+                 (4, 'flat', 2, 4, 120.), (5, 'flat', 3, 4, 1.), (6, 'flat', 4, 4, 120.)]),
+            ## a flat from a long sequence stops the search
+            'long_flat_sequence': (
+                [(i, 'flat', 'flat', i) for i in range(1, 5)],
+                [(1, 'flat', 1, 5, 120.), (2, 'flat', 1, 3, 120.), (3, 'flat', 2, 3, 120.),
+                 (4, 'flat', 3, 3, 120.)]),
+        }
+        results = {}
+        for name, (prows, erows) in cases.items():
+            ptable, etable = self._calib_tables(prows, erows)
+            results[name] = self._new_parse(etable, ptable)
+            self.assertEqual(results[name], self._old_parse(etable, ptable), msg=name)
+
+        self.assertEqual(results['duplicate_jobdesc'][0],
+                         {'nightlybias': 1, 'ccdcalib': 2, 'psfnight': 5, 'nightlyflat': 8})
+        self.assertEqual(results['arc_sequences'][1], [6, 7, 8])
+        self.assertEqual(results['flat_sequence'][2], [3, 4, 6])
+        self.assertEqual(results['long_flat_sequence'][2], [2, 3, 4])
+
+    def test_parse_previous_tables_duplicate_expids(self):
+        """Test that the first exposure table row is used when an EXPID is repeated"""
+        prows = [(i, 'arc', 'arc', i) for i in range(1, 4)]
+        erows = [(1, 'arc', 1, 3, 5.), (2, 'arc', 2, 3, 5.), (2, 'arc', 9, 3, 5.), (3, 'arc', 3, 3, 5.)]
+        ptable, etable = self._calib_tables(prows, erows)
+        self.assertEqual(self._new_parse(etable, ptable)[1], [1, 2, 3])
+
+        ## with the repeated row first, the arc sequence is broken at that exposure
+        erows[1], erows[2] = erows[2], erows[1]
+        ptable, etable = self._calib_tables(prows, erows)
+        self.assertEqual(self._new_parse(etable, ptable)[1], [3])
+
+    def test_set_calibrator_flag(self):
+        """Test that set_calibrator_flag flags the same rows as the original per-row loop"""
+        cases = {
+            'simple': ([0, 1, 2, 3], [1, 2]),
+            'repeated_table_intids': ([0, 1, 1, 2, 2], [1, 2]),
+            'repeated_input_intids': ([0, 1, 2, 3], [2, 2, 3]),
+            'unknown_intid': ([0, 1, 2], [2, 7]),
+            'no_inputs': ([0, 1, 2], []),
+        }
+        for name, (intids, flagged) in cases.items():
+            ptable = self._ptable(['COMPLETED'] * len(intids))
+            ptable['INTID'] = intids
+            expected = ptable.copy()
+            for intid in flagged:
+                expected['CALIBRATOR'][expected['INTID'] == intid] = 1
+            ## inputs given as dicts and as Table.Rows of the processing table
+            for prows in ([{'INTID': intid} for intid in flagged],
+                          [ptable[intids.index(intid)] for intid in flagged if intid in intids]):
+                result = procfuncs.set_calibrator_flag(prows, ptable.copy())
+                self.assertEqual(list(result['CALIBRATOR']), list(expected['CALIBRATOR']), msg=name)
+                self.assertEqual(result['CALIBRATOR'].dtype, np.int8)
+
+def test_suite():
+    """Allows testing of only this module with the command::
+
+        python setup.py test -m <modulename>
+    """
+    return unittest.defaultTestLoader.loadTestsFromName(__name__)
+
+#- run all unit tests in this file
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+# -*- coding: utf-8 -*-
+"""Test desispec.workflow.queue
+"""
+
+import unittest
+import numpy as np
+from astropy.table import Table
+from desispec.workflow.queue import update_from_queue
+
+class TestQueue(unittest.TestCase):
+    """Test desispec.workflow.queue
+    """
+
+    def _old_update(self, ptable, qtable):
+        """
+        Update the statuses by matching each queue entry against the full LATEST_QID column,
+        as update_from_queue originally did
+        """
+        for row in qtable:
+            match = (int(row['JOBID']) == ptable['LATEST_QID'])
+            if np.any(match):
+                ind = np.where(match)[0][0]
+                ptable['STATUS'][ind] = str(row['STATE']).split(' ')[0]
+        return ptable
+
+    def test_update_from_queue(self):
+        """Test that update_from_queue matches the original loop, including repeated QIDs"""
+        cases = {
+            'simple': ([11, 12, 13], [(12, 'RUNNING'), (13, 'COMPLETED')]),
+            'unsubmitted_and_unknown': ([-99, 12, -99], [(12, 'FAILED'), (99, 'COMPLETED')]),
+            'repeated_ptable_qids': ([11, 12, 12, 11], [(11, 'TIMEOUT'), (12, 'COMPLETED')]),
+            'repeated_queue_jobids': ([11, 12], [(12, 'PENDING'), (12, 'RUNNING'), (11, 'CANCELLED by 123')]),
+            'empty_queue': ([11, 12], []),
+        }
+        for name, (qids, qrows) in cases.items():
+            ptable = Table({'LATEST_QID': np.array(qids, dtype=int),
+                            'STATUS': np.array(['SUBMITTED'] * len(qids), dtype='S14')})
+            qtable = Table(rows=qrows, names=['JOBID', 'STATE'], dtype=[int, 'S20'])
+            expected = self._old_update(ptable.copy(), qtable)
+            result = update_from_queue(ptable, qtable=qtable)
+            self.assertEqual(list(result['STATUS']), list(expected['STATUS']), msg=name)
+
+        ptable = Table({'LATEST_QID': np.array([11, 12, 12, 11], dtype=int),
+                        'STATUS': np.array(['SUBMITTED'] * 4, dtype='S14')})
+        qtable = Table(rows=[(11, 'TIMEOUT'), (12, 'CANCELLED by 123')], names=['JOBID', 'STATE'])
+        result = update_from_queue(ptable, qtable=qtable)
+        self.assertEqual(list(result['STATUS']), ['TIMEOUT', 'CANCELLED', 'SUBMITTED', 'SUBMITTED'])
+
+def test_suite():
+    """Allows testing of only this module with the command::
+
+        python setup.py test -m <modulename>
+    """
+    return unittest.defaultTestLoader.loadTestsFromName(__name__)
+
+#- run all unit tests in this file
+if __name__ == '__main__':
+    unittest.main()
@@ -225,6 +225,9 @@ def load_raw_data_header(pathname, return_filehandle=False):
         fx.close()
         return hdr
 
+## Extension names of the per-camera HDUs in a raw data file, e.g. B0 or Z9
+_RAW_CAMERA_EXTNAME = re.compile(r'^[brzBRZ][\d]$')
+
 def cameras_from_raw_data(rawdata):
     """
     Takes a filepath or fitsio FITS object corresponding to a DESI raw data file
@@ -246,11 +249,12 @@ def cameras_from_raw_data(rawdata):
     else:
         fx = rawdata
 
-    recam = re.compile('^[brzBRZ][\d]$')
+    ## Only the HDU names are needed; no HDU data is read
     cameras = list()
     for hdu in fx.hdu_list:
-        if recam.match(hdu.get_extname()):
-            cameras.append(hdu.get_extname().lower())
+        extname = hdu.get_extname()
+        if _RAW_CAMERA_EXTNAME.match(extname):
+            cameras.append(extname.lower())
     return cameras
 
 def update_args_with_headers(args):
@@ -5,11 +5,14 @@ desispec.workflow.exptable
 """
 import os
 import glob
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 import numpy as np
+import fitsio
 from astropy.table import Table
-from astropy.io import fits
 ## Import some helper functions, you can see their definitions by uncomenting the bash shell command
-from desispec.workflow.utils import define_variable_from_environment, get_json_dict
+from desispec.workflow.utils import define_variable_from_environment, get_json_dict, listpath
 from desispec.workflow.desi_proc_funcs import load_raw_data_header, cameras_from_raw_data
 from desiutil.log import get_logger
 from desispec.util import header2night
@@ -46,6 +49,21 @@ from desispec.io.util import create_camword, parse_badamps
 #                       to put notes for other humans.
 ##################################################
 
+## Substrings of pre-2020-08-01 manifest PROGRAM names and the end-of-calibration label they map to. Checked in order.
+_MANIFEST_TOKEN_MAP = {'short': 'endofshortflats', 'long': 'endofflats', 'arc': 'endofarcs'}
+## Standardized manifest names (post-2020-08-01) that signify the end of a calibration sequence
+_END_OF_CAL_MANIFESTS = frozenset(['endofarcs', 'endofflats', 'endofshortflats'])
+## Sentinel for header lookups where None could be a legitimate value
+_MISSING = object()
+## Lowercase string constants used in per-exposure comparisons in summarize_exposure
+_SCIENCE = 'science'
+_OBSTYPES_REQUIRING_DATA = frozenset(['science', 'arc', 'flat', 'dark'])
+_NON_HEADER_COLUMNS = frozenset(['EFFTIME_ETC', 'CAMWORD', 'NIGHT', 'SURVEY', 'FA_SURV', 'FAPRGRM', 'GOALTIME',
+                                 'GOALTYPE', 'SPEED', 'EBVFAC', 'LASTSTEP', 'BADCAMWORD', 'BADAMPS', 'EXPFLAG',
+                                 'HEADERERR', 'COMMENTS'])
+## Columns holding arrays of strings, which summarize_exposure builds up as lists
+_ARRAY_COLUMNS = ('HEADERERR', 'EXPFLAG', 'COMMENTS')
+
 def exposure_table_column_defs():
     """
     Contains the column names, data types, and default row values for a DESI Exposure table. It returns
@@ -144,10 +162,12 @@ def get_last_step_options():
     """
     return ['ignore', 'skysub', 'stdstarfit', 'fluxcal', 'all']
 
+@lru_cache(maxsize=2)
 def get_exposure_table_column_defs(return_default_values=False):
     """
     Contains the column names, data types, and default row values for a DESI Exposure table. It returns
-    the names and datatypes with the defaults being given with an optional flag. Returned as 2 (or 3) lists.
+    the names and datatypes with the defaults being given with an optional flag. Returned as 2 (or 3) tuples.
+    The result is cached, so the tuples are immutable and shared between callers.
 
     Args:
         return_default_values (bool, optional): ``True`` if you want the default values returned.
@@ -155,18 +175,14 @@ def get_exposure_table_column_defs(return_default_values=False):
     Returns:
         tuple: A tuple containing:
 
-        * colnames, list. List of column names for an exposure table.
-        * coltypes, list. List of column datatypes for the names in colnames.
-        * coldeflts, list. Optionally returned if return_default_values is True. List of default values for the
+        * colnames, tuple. Column names for an exposure table.
+        * coltypes, tuple. Column datatypes for the names in colnames.
+        * coldeflts, tuple. Optionally returned if return_default_values is True. Default values for the
           corresponding colnames.
     """
     columns = exposure_table_column_defs()
 
-    colnames, coltypes, coldeflt = [], [], []
-    for colname, coltype, coldef in columns:
-        colnames.append(colname)
-        coltypes.append(coltype)
-        coldeflt.append(coldef)
+    colnames, coltypes, coldeflt = (tuple(col) for col in zip(*columns))
 
     if return_default_values:
         return colnames, coltypes, coldeflt
@@ -181,13 +197,8 @@ def get_exposure_table_column_names():
     Returns:
         list: List of column names for an exposure table.
     """
-    columns  = exposure_table_column_defs()
-
-    colnames = []
-    for colname, coltype, coldef in columns:
-        colnames.append(colname)
-
-    return colnames
+    colnames, coltypes = get_exposure_table_column_defs()
+    return list(colnames)
 
 def get_exposure_table_column_types(asdict=True):
     """
@@ -204,16 +215,12 @@ def get_exposure_table_column_types(asdict=True):
         names as the keys. If False, a list of datatypes in the same order as the names
         returned from get_exposure_table_column_names().
     """
-    columns = exposure_table_column_defs()
+    colnames, coltypes = get_exposure_table_column_defs()
 
     if asdict:
-        coltypes = {}
-        for colname, coltype, coldef in columns:
-            coltypes[colname] = coltype
+        coltypes = dict(zip(colnames, coltypes))
     else:
-        coltypes = []
-        for colname, coltype, coldef in columns:
-            coltypes.append(coltype)
+        coltypes = list(coltypes)
 
     return coltypes
 
@@ -232,19 +239,16 @@ def get_exposure_table_column_defaults(asdict=True):
         names as the keys. If False, a list of defaults in the same order as the names
         returned from get_exposure_table_column_names().
     """
-    columns = exposure_table_column_defs()
+    colnames, coltypes, coldefs = get_exposure_table_column_defs(return_default_values=True)
 
     if asdict:
-        coldefs = {}
-        for colname, coltype, coldef in columns:
-            coldefs[colname] = coldef
+        coldefs = dict(zip(colnames, coldefs))
     else:
-        coldefs = []
-        for colname, coltype, coldef in columns:
-            coldefs.append(coldef)
+        coldefs = list(coldefs)
 
     return coldefs
 
+@lru_cache(maxsize=None)
 def night_to_month(night):
     """
     Trivial function that returns the month portion of a night. Can be given a string or int.
@@ -257,6 +261,7 @@ def night_to_month(night):
     """
     return str(night)[:-2]
 
+@lru_cache(maxsize=None)
 def get_exposure_table_name(night, extension='csv'):
     """
     Defines the default exposure name given the night of the observations and the optional extension.
@@ -288,6 +293,7 @@ def get_exposure_table_path(night=None, usespecprod=True):
     """
     # if night is None and 'PROD_NIGHT' in os.environ:
     #     night = os.environp['PROD_NIGHT']
+    ## The environment is read on every call so that the cached paths below follow changes to it
     if usespecprod:
         basedir = define_variable_from_environment(env_name='DESI_SPECTRO_REDUX',
                                                       var_descr="The specprod path")
@@ -297,6 +303,21 @@ def get_exposure_table_path(night=None, usespecprod=True):
     else:
         basedir = define_variable_from_environment(env_name='DESI_SPECTRO_LOG',
                                                    var_descr="The exposure table repository path")
+    return _exposure_table_path(basedir, night)
+
+@lru_cache(maxsize=1024)
+def _exposure_table_path(basedir, night):
+    """
+    Cached implementation of get_exposure_table_path for an already resolved base directory.
+
+    Args:
+        basedir (str): The production or exposure table repository directory containing exposure_tables.
+        night (int or str or None): The night corresponding to the exposure table. If None, no monthly
+            subdirectory is used.
+
+    Returns:
+        str: The full path to the directory where the exposure table should be written (or is already written).
+    """
     if night is None:
         return os.path.join(basedir,'exposure_tables')
     else:
@@ -339,12 +360,56 @@ def instantiate_exposure_table(colnames=None, coldtypes=None, rows=None):
     if colnames is None or coldtypes is None:
        colnames, coldtypes = get_exposure_table_column_defs()
 
-    exposure_table = Table(names=colnames,dtype=coldtypes)
-    if rows is not None:
+    if rows is None:
+        return Table(names=colnames,dtype=coldtypes)
+
+    ## Transpose the rows into one array per column and build the table in one step, rather than
+    ## reallocating every column for each call to add_row
+    rows = list(rows)
+    try:
+        values_by_col = [[row[name] for row in rows] for name in colnames]
+    except KeyError:
+        ## Rows missing a column fall back to add_row, which fills in the missing cells
+        exposure_table = Table(names=colnames, dtype=coldtypes)
         for row in rows:
             exposure_table.add_row(row)
+        return exposure_table
+
+    columns = []
+    for name, dtype, values in zip(colnames, coldtypes, values_by_col):
+        if dtype is np.ndarray:
+            ## Fill element-wise so equal length arrays aren't broadcast into a 2d column
+            col = np.empty(len(values), dtype=object)
+            for i, val in enumerate(values):
+                col[i] = val
+        else:
+            dtype = np.dtype(dtype)
+            col = np.asarray(values)
+            if dtype.kind in 'SU' and len(col) > 0 and col.dtype.kind in 'SU':
+                ## Widen string columns to hold the longest value, as add_row does, rather than truncating
+                width = dtype.itemsize // np.dtype(f'{dtype.kind}1').itemsize
+                width = max(width, int(np.max(np.char.str_len(col))))
+                col = col.astype(f'{dtype.kind}{width}')
+            else:
+                col = col.astype(dtype)
+        columns.append(col)
+    exposure_table = Table(columns, names=colnames)
     return exposure_table
 
+@lru_cache(maxsize=256)
+def _camword_for(cams):
+    """
+    Cached wrapper of create_camword. Camera configurations repeat heavily within a night, so the camword
+    only needs to be assembled once per unique configuration.
+
+    Args:
+        cams, tuple. Sorted tuple of camera strings, e.g. ('b0', 'r0', 'z0').
+
+    Returns:
+        str: The camword for the given cameras.
+    """
+    return create_camword(cams)
+
 def keyval_change_reporting(keyword, original_val, replacement_val):
     """
     Creates a reporting string to be saved in the HEADERERR or COMMENTS column of the exposure table. Give the keyword,
@@ -389,6 +454,47 @@ def deconstruct_keyval_reporting(entry):
     val1,val2 = values.split("->")
     return key, val1, val2
 
+@lru_cache(maxsize=1024)
+def _exposure_paths(raw_data_dir, night, exp):
+    """
+    Defines the directory, filenames, and full pathnames of the raw data products for an exposure. Cached since
+    exposures are often summarized more than once in a session, e.g. when polling for new data.
+
+    Args:
+        raw_data_dir, str. The path to where the raw data is stored.
+        night, str. The night of the exposure.
+        exp, int. The exposure id.
+
+    Returns:
+        tuple: A tuple containing:
+
+        * expdir, str. The directory containing the raw data for the exposure.
+        * filenames, tuple. The manifest, request, raw data, and etc filenames, in that order.
+        * pathnames, tuple. The full pathnames corresponding to filenames.
+    """
+    ## TODO: tie these back in with desispec.io.meta
+    expstr = f'{exp:08d}'
+    expdir = os.path.join(raw_data_dir, night, expstr)
+    filenames = (f'manifest_{expstr}.json', f'request-{expstr}.json',
+                 f'desi-{expstr}.fits.fz', f'etc-{expstr}.json')
+    pathnames = tuple(os.path.join(expdir, name) for name in filenames)
+    return expdir, filenames, pathnames
+
+
+def _load_request(req_raw):
+    """
+    Parses the raw contents of a request json file into a dictionary.
+
+    Args:
+        req_raw (bytes or None): The contents of the request file, or None if there was no request file.
+
+    Returns:
+        dict: The request file contents, or an empty dictionary if req_raw is None.
+    """
+    if req_raw is None:
+        return {}
+    return json.loads(req_raw)
+
 
 def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, coldefaults=None, verbosely=False):
     """
@@ -426,7 +532,6 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
 
     ## Make sure the inputs are in the right format
     exp = int(exp)
-    expstr = f'{exp:08d}'
 
     night = str(night)
 
@@ -449,26 +554,28 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
             log.warning("Lengths of colnames and coldefaults must be equal. Ignoring user specified values.")
         else:
             log.info("Using user specified colnames and coldefaults.")
-            coldefault_dict = {}
-            for name,default in zip(colnames,coldefaults):
-                coldefault_dict[name] = default
+            coldefault_dict = dict(zip(colnames, coldefaults))
     elif colnames is not None:
         for name in colnames:
             if name not in coldefault_dict:
                 log.warning(f"User specified {name} not in available colnames {coldefault_dict.keys()}.")
-        for key in list(coldefault_dict.keys()):
-            if key not in colnames:
-                coldefault_dict.pop(key)
+        keep = set(colnames)
+        coldefault_dict = {key: default for key, default in coldefault_dict.items() if key in keep}
 
     ## Define the pathnames to the various data products
-    ## TODO: tie these back in with desispec.io.meta
-    manpath = os.path.join(raw_data_dir, night, expstr, f'manifest_{expstr}.json')
-    reqpath = os.path.join(raw_data_dir, night, expstr, f'request-{expstr}.json')
-    datpath = os.path.join(raw_data_dir, night, expstr, f'desi-{expstr}.fits.fz')
-    etcpath = os.path.join(raw_data_dir, night, expstr, f'etc-{expstr}.json')
+    expdir, filenames, pathnames = _exposure_paths(raw_data_dir, night, exp)
+    manname, reqname, datname, etcname = filenames
+    manpath, reqpath, datpath, etcpath = pathnames
+
+    ## List the exposure directory once and check for the raw data products against that listing,
+    ## rather than stat'ing each file individually
+    try:
+        expfiles = frozenset(os.listdir(expdir))
+    except FileNotFoundError:
+        expfiles = frozenset()
 
     ## If there is a manifest file, open it and see what it says
-    if os.path.isfile(manpath):
+    if manname in expfiles:
         log.info(f'Found manifest file: {manpath}')
         ## Load the json file in as a dictionary
         manifest_dict = get_json_dict(manpath)
@@ -478,19 +585,16 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
             if 'PROGRAM' in manifest_dict:
                 prog = manifest_dict['PROGRAM'].lower()
                 if 'calib' in prog and 'done' in prog:
-                    if 'short' in prog:
-                        return "endofshortflats"
-                    elif 'long' in prog:
-                        return 'endofflats'
-                    elif 'arc' in prog:
-                        return 'endofarcs'
+                    for token, label in _MANIFEST_TOKEN_MAP.items():
+                        if token in prog:
+                            return label
                 else:
                     log.warning(f"Couldn't parse program name {prog} in manifest.")
         else:
             ## Starting Fall of 2020 the manifest should have standardized language, so no program parsing
             if 'MANIFEST' in manifest_dict:
                 name = manifest_dict['MANIFEST'].lower()
-                if name in ['endofarcs', 'endofflats', 'endofshortflats']:
+                if name in _END_OF_CAL_MANIFESTS:
                     return name
                 elif name in ['endofzeros']:
                     log.info(f"Found {name} flag. Not using that information.")
@@ -501,16 +605,22 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
 
     ## Request json file can also be used to identify the end of calibrations
     ## It also has information on what we wanted the exposure to be, which is useful to check against what we got
-    if os.path.isfile(reqpath):
+    ## Only the raw bytes are read here. They are parsed into a dictionary once we know they are needed,
+    ## so exposures rejected on the raw data header never pay for parsing the json
+    if reqname in expfiles:
         log.info(f"Found request file: {reqpath}")
-        ## Load the json file in as a dictionary
-        req_dict = get_json_dict(reqpath)
+        with open(reqpath, 'rb') as req:
+            req_raw = req.read()
     else:
         log.error(f"Couldn't find request file: {reqpath}.")
-        req_dict = {}
-
-    ## Check to see if it is a manifest file for calibrations
-    if "SEQUENCE" in req_dict and req_dict["SEQUENCE"].lower() == "manifest":
+        req_raw = None
+    req_dict = None
+
+    ## Check to see if it is a manifest file for calibrations. Those are the only requests that contain the
+    ## word manifest, so only those need to be parsed at this point
+    if req_raw is not None and b'manifest' in req_raw.lower():
+        req_dict = _load_request(req_raw)
+    if req_dict is not None and "SEQUENCE" in req_dict and req_dict["SEQUENCE"].lower() == "manifest":
         ## standardize the naming of end of arc/flats as best we can
         if int(night) < 20200310:
             pass
@@ -518,25 +628,24 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
             if 'PROGRAM' in req_dict:
                 prog = req_dict['PROGRAM'].lower()
                 if 'calib' in prog and 'done' in prog:
-                    if 'short' in prog:
-                        return "endofshortflats"
-                    elif 'long' in prog:
-                        return 'endofflats'
-                    elif 'arc' in prog:
-                        return 'endofarcs'
+                    for token, label in _MANIFEST_TOKEN_MAP.items():
+                        if token in prog:
+                            return label
         else:
             if 'MANIFEST' in req_dict:
                 manifest = req_dict['MANIFEST']
                 if 'name' in manifest:
                     name = manifest['name'].lower()
-                    if name in ['endofarcs', 'endofflats', 'endofshortflats']:
+                    if name in _END_OF_CAL_MANIFESTS:
                         return name
 
     ## Look for the data. If it's not there, say so then move on
-    if not os.path.exists(datpath):
+    if datname not in expfiles:
+        if req_dict is None:
+            req_dict = _load_request(req_raw)
         if 'OBSTYPE' not in req_dict:
             logtype = log.error
-        elif req_dict['OBSTYPE'].lower() in ['science','arc','flat', 'dark']:
+        elif req_dict['OBSTYPE'].lower() in _OBSTYPES_REQUIRING_DATA:
             logtype = log.error
         else:
             logtype = log.info
@@ -550,15 +659,18 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
         dat_header, fx = load_raw_data_header(pathname=datpath, return_filehandle=True)
 
     ## If FLAVOR is wrong or no obstype is defines, skip it
-    if 'FLAVOR' not in dat_header:
+    ## Read FLAVOR and OBSTYPE once each, rather than a membership test followed by indexing
+    flavor = dat_header.get('FLAVOR', _MISSING)
+    hdr_obstype = dat_header.get('OBSTYPE', _MISSING)
+    if flavor is _MISSING:
         if verbosely:
             log.info(f'WARNING: {reqpath} -- flavor not given!')
         else:
             log.info(f'{exp}: skipped  -- flavor not given!')
         return None
 
-    flavor = dat_header['FLAVOR'].lower()
-    if flavor != 'science' and 'dark' not in obstypes and 'zero' not in obstypes:
+    flavor = flavor.lower()
+    if flavor != _SCIENCE and 'dark' not in obstypes and 'zero' not in obstypes:
         ## If FLAVOR is wrong
         if verbosely:
             log.info(f'ignoring: {reqpath} -- {flavor} not a flavor we care about')
@@ -566,7 +678,7 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
             log.info(f'{exp}: skipped  -- {flavor} not a relevant flavor')
         return None
 
-    if 'OBSTYPE' not in dat_header:
+    if hdr_obstype is _MISSING:
         ## If no obstype is defines, skip it
         if verbosely:
             log.info(f'ignoring: {reqpath} -- {flavor} flavor but obstype not defined')
@@ -575,7 +687,7 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
         return None
 
     ## If obstype isn't in our list of ones we care about, skip it
-    obstype = dat_header['OBSTYPE'].lower()
+    obstype = hdr_obstype.lower()
     if obstype not in obstypes:
         ## If obstype is wrong
         if verbosely:
@@ -586,23 +698,31 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
     else:
         log.info(f"Exposure {exp} has obstype: {obstype}")
 
+    ## The exposure is being kept, so now load the request json in as a dictionary
+    if req_dict is None:
+        req_dict = _load_request(req_raw)
+
     ## Define the column values for the current exposure in a dictionary
+    ## The array-valued columns are accumulated as lists and only converted to arrays at the end
     outdict = coldefault_dict.copy()
+    for key in _ARRAY_COLUMNS:
+        if key in outdict:
+            outdict[key] = list(outdict[key])
 
     ## Get the cameras available in the raw data and summarize with camword
-    cams = cameras_from_raw_data(fx)
-    outdict['CAMWORD'] = create_camword(cams)
+    cams = tuple(sorted(cameras_from_raw_data(fx)))
+    outdict['CAMWORD'] = _camword_for(cams)
     fx.close()
 
     ## Loop over columns and fill in the information. If unavailable report/flag if necessary and assign default
     for key,default in coldefault_dict.items():
         ## These are dealt with separately
-        if key in ['EFFTIME_ETC', 'CAMWORD', 'NIGHT', 'SURVEY', 'FA_SURV', 'FAPRGRM', 'GOALTIME', 'GOALTYPE', 'SPEED',
-                   'EBVFAC', 'LASTSTEP', 'BADCAMWORD', 'BADAMPS', 'EXPFLAG', 'HEADERERR', 'COMMENTS']:
+        if key in _NON_HEADER_COLUMNS:
             continue
-        ## Try to find the key in the raw data header
-        elif key in dat_header:
-            val = dat_header[key]
+
+        ## Try to find the key in the raw data header. Single lookup with a sentinel rather than "in" then "[]"
+        val = dat_header.get(key, _MISSING)
+        if val is not _MISSING:
             if isinstance(val, str):
                 outdict[key] = val.lower().strip()
             else:
@@ -612,7 +732,7 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
         elif key in ['SEQNUM','SEQTOT'] and obstype not in ['arc','flat']:
             continue
         ## If tileid or TARGT and not science, just replace with default
-        elif key in ['TILEID','TARGTRA','TARGTDEC'] and obstype not in ['science']:
+        elif key in ['TILEID','TARGTRA','TARGTDEC'] and obstype != _SCIENCE:
             continue
         ## If trying to assign purpose and it's before that was defined, just give default
         elif key in ['PURPOSE'] and int(night) < 20201201:
@@ -621,10 +741,10 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
         else:
             log.warning(f"Missing header keyword: {key}. Using default {default}")
             if 'metadata_missing' not in outdict['EXPFLAG']:
-                outdict['EXPFLAG'] = np.append(outdict['EXPFLAG'], 'metadata_missing')
+                outdict['EXPFLAG'].append('metadata_missing')
             if np.isscalar(default):
                 reporting = keyval_change_reporting(key, '', default)
-                outdict['HEADERERR'] = np.append(outdict['HEADERERR'], reporting)
+                outdict['HEADERERR'].append(reporting)
 
     ## Make sure that the night is defined:
     try:
@@ -632,7 +752,7 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
     except (KeyError, ValueError, TypeError):
         log.error(f"int(dat_header['NIGHT']) failed for exp={exp}")
         if 'metadata_missing' not in outdict['EXPFLAG']:
-            outdict['EXPFLAG'] = np.append(outdict['EXPFLAG'], 'metadata_missing')
+            outdict['EXPFLAG'].append('metadata_missing')
         try:
             outdict['NIGHT'] = header2night(dat_header)
         except (KeyError, ValueError, TypeError):
@@ -643,7 +763,7 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
         except (KeyError, ValueError, TypeError):
             orig = ''
         reporting = keyval_change_reporting('NIGHT',orig,outdict['NIGHT'])
-        outdict['HEADERERR'] = np.append(outdict['HEADERERR'],reporting)
+        outdict['HEADERERR'].append(reporting)
 
     ## Verify we agree on what we're looking at
     if exp != outdict['EXPID']:
@@ -654,18 +774,19 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
     ## For Things defined in both request and data, if they don't match, flag in the
     ##     output file for followup/clarity
     for check in ['OBSTYPE']:#, 'FLAVOR']:
-        if check in req_dict and check in dat_header:
-            rval, hval = req_dict[check], dat_header[check]
+        hval = dat_header.get(check, _MISSING)
+        if check in req_dict and hval is not _MISSING:
+            rval = req_dict[check]
             if rval != hval:
                 log.warning(f'In keyword {check}, request and data header disagree: req:{rval}\tdata:{hval}')
                 if 'metadata_mismatch' not in outdict['EXPFLAG']:
-                    outdict['EXPFLAG'] = np.append(outdict['EXPFLAG'], 'metadata_mismatch')
-                outdict['COMMENTS'] = np.append(outdict['COMMENTS'],f'For {check}: req={rval} but hdu={hval}')
+                    outdict['EXPFLAG'].append('metadata_mismatch')
+                outdict['COMMENTS'].append(f'For {check}: req={rval} but hdu={hval}')
             else:
                 if verbosely:
                     log.info(f'{check} checks out')
         else:
-            if check not in dat_header:
+            if hval is _MISSING:
                 log.warning(f'{check} not found in header of exp {exp}')
             else:
                 log.warning(f'{check} not found in request file of exp {exp}')
@@ -676,14 +797,14 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
     # if np.abs(float(rval)-float(hval))>0.5:
     #     log.warning(f'In keyword {check}, request and data header disagree: req:{rval}\tdata:{hval}')
     #     if 'aborted' not in outdict['EXPFLAG']:
-    #         outdict['EXPFLAG'] = np.append(outdict['EXPFLAG'], 'aborted')
-    #     outdict['COMMENTS'] = np.append(outdict['COMMENTS'],f'For {check}: req={rval} but hdu={hval}')
+    #         outdict['EXPFLAG'].append('aborted')
+    #     outdict['COMMENTS'].append(f'For {check}: req={rval} but hdu={hval}')
     # else:
     #     if verbosely:
     #         log.info(f'{check} checks out')
 
     ## Now for science exposures,
-    if obstype == 'science':
+    if obstype == _SCIENCE:
         ## fiberassign used to be uncompressed, check the new format first but try old if necessary
         tileid = outdict['TILEID']
         if tileid == coldefault_dict['TILEID']:
@@ -692,10 +813,10 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
             fba_header = {}
             extra_in_fba = False
         else:
-            fbaraw = os.path.join(raw_data_dir, night, expstr,
-                                   f"fiberassign-{tileid:06d}.fits")
-            if os.path.exists(fbaraw+'.gz'):
-                fbaraw = fbaraw+'.gz'
+            fbaname = f"fiberassign-{tileid:06d}.fits"
+            if fbaname+'.gz' in expfiles:
+                fbaname = fbaname+'.gz'
+            fbaraw = os.path.join(expdir, fbaname)
 
             targdir = os.getenv('DESI_TARGET')
             fbasvn = os.path.join(targdir, 'fiberassign', 'tiles', 'trunk',
@@ -715,12 +836,11 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
                 log.info(f'{fbasvn}[.gz] not found; sticking with raw data fiberassign file')
 
             ## Load fiberassign file. If not available return empty dict
-            if os.path.isfile(fbafinal):
+            if fbafinal == fbasvn or fbaname in expfiles:
                 log.info(f"Found fiberassign file: {fbafinal}.")
-                fba = fits.open(fbafinal)
-                extra_in_fba = ('EXTRA' in fba)
-                fba_header = fba['PRIMARY'].header
-                fba.close()
+                with fitsio.FITS(fbafinal) as fba:
+                    extra_in_fba = ('EXTRA' in fba)
+                    fba_header = fba[0].read_header()
             else:
                 log.error(f"Couldn't find fiberassign file: {fbafinal}.")
                 fba_header = {}
@@ -737,9 +857,10 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
                     break
 
         ## Load etc json file. If not available return empty dict
-        if os.path.isfile(etcpath):
+        if etcname in expfiles:
             log.info(f"Found etc file: {etcpath}.")
-            etc_dict = get_json_dict(etcpath)
+            with open(etcpath, 'r') as etc:
+                etc_dict = json.load(etc)
         else:
             log.warning(f"Couldn't find etc file: {etcpath}.")
             etc_dict = {}
@@ -767,7 +888,7 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
                 except:
                     orig = ''
                 reporting = keyval_change_reporting('ETCTEFF', orig, outdict['EFFTIME_ETC'])
-                outdict['HEADERERR'] = np.append(outdict['HEADERERR'], reporting)
+                outdict['HEADERERR'].append(reporting)
                 log.error(f"Couldn't convert ETCTEFF with value {orig} to float.")
         elif int(outdict['NIGHT']) < 20210614 and 'ACTTEFF' in dat_header:
             try:
@@ -778,7 +899,7 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
                 except:
                     orig = ''
                 reporting = keyval_change_reporting('ACTTEFF', orig, outdict['EFFTIME_ETC'])
-                outdict['HEADERERR'] = np.append(outdict['HEADERERR'], reporting)
+                outdict['HEADERERR'].append(reporting)
                 log.error(f"Couldn't convert ACTTEFF with value {orig} to float.")
 
         ## Get the airmass factor from the etc. If unavailable, try to calculate from the airmass in the raw data
@@ -816,28 +937,29 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
                 log.warning("No EFFTIME_ETC found. Not performing speed cut.")
 
         ## Flag the exposure based on PROGRAM information
+        ## PROGRAM was already lowercased when read from the header
         ## Define thresholds
         threshold_exptime = 60.
-        if 'system test' in outdict['PROGRAM'].lower():
+        if 'system test' in outdict['PROGRAM']:
             outdict['LASTSTEP'] = 'ignore'
-            outdict['EXPFLAG'] = np.append(outdict['EXPFLAG'], 'test')
+            outdict['EXPFLAG'].append('test')
             log.warning(f"LASTSTEP CHANGE. Exposure {exp} identified as system test. Not processing.")
-        elif obstype == 'science' and 'undither' in outdict['PROGRAM']:
+        elif obstype == _SCIENCE and 'undither' in outdict['PROGRAM']:
             outdict['LASTSTEP'] = 'skysub'
             log.warning(f"LASTSTEP CHANGE. Science exposure {exp} identified as undithered. Processing through " +
                         "sky subtraction.")
-            outdict['COMMENTS'] = np.append(outdict['COMMENTS'], 'undithered dither')
-        elif (obstype == 'science' and 'dither' in outdict['PROGRAM']) or extra_in_fba:
+            outdict['COMMENTS'].append('undithered dither')
+        elif (obstype == _SCIENCE and 'dither' in outdict['PROGRAM']) or extra_in_fba:
             outdict['LASTSTEP'] = 'skysub'
-            outdict['COMMENTS'] = np.append(outdict['COMMENTS'], 'dither seq')
+            outdict['COMMENTS'].append('dither seq')
             log.warning(f"LASTSTEP CHANGE. Science exposure {exp} identified as dither. Processing " +
                         "through sky subtraction.")
         ## Otherwise check that the data meets quality standards
         ## Cut on signal:
         elif float(outdict['EXPTIME']) < threshold_exptime:
             outdict['LASTSTEP'] = 'skysub'
-            outdict['EXPFLAG'] = np.append(outdict['EXPFLAG'], 'short_exposure')
-            outdict['COMMENTS'] = np.append(outdict['COMMENTS'], f'EXPTIME={outdict["EXPTIME"]:.1f}s lt {threshold_exptime:.1f}')
+            outdict['EXPFLAG'].append('short_exposure')
+            outdict['COMMENTS'].append(f'EXPTIME={outdict["EXPTIME"]:.1f}s lt {threshold_exptime:.1f}')
             log.warning(f"LASTSTEP CHANGE. Science exposure {exp} with EXPTIME={outdict['EXPTIME']:.2f} less" +
                         f" than {threshold_exptime:.1f}s. Processing through sky subtraction.")
         elif outdict['SURVEY'] == 'main':
@@ -858,10 +980,9 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
             ## Cut on S/N:
             if efftime < threshold_efftime:
                 outdict['LASTSTEP'] = 'skysub'
-                outdict['EXPFLAG'] = np.append(outdict['EXPFLAG'], 'low_sn')
-                outdict['COMMENTS'] = np.append(outdict['COMMENTS'],
-                                                f'efftime={outdict["EFFTIME_ETC"]:.1f}s '
-                                                + f'lt {threshold_efftime:.1f}')
+                outdict['EXPFLAG'].append('low_sn')
+                outdict['COMMENTS'].append(f'efftime={outdict["EFFTIME_ETC"]:.1f}s '
+                                           + f'lt {threshold_efftime:.1f}')
                 log.warning(f"LASTSTEP CHANGE. Science exposure {exp} "
                             + f"with EFFTIME={outdict['EFFTIME_ETC']:.2f} "
                             + f"less than {threshold_efftime:.1f}. "
@@ -869,17 +990,62 @@ def summarize_exposure(raw_data_dir, night, exp, obstypes=None, colnames=None, c
             ## Cut on Speed:
             elif speed < threshold_speed:
                 outdict['LASTSTEP'] = 'skysub'
-                outdict['EXPFLAG'] = np.append(outdict['EXPFLAG'], 'low_speed')
-                outdict['COMMENTS'] = np.append(outdict['COMMENTS'],
-                                                f'speed={speed:.3f} lt {threshold_speed:.3f}')
+                outdict['EXPFLAG'].append('low_speed')
+                outdict['COMMENTS'].append(f'speed={speed:.3f} lt {threshold_speed:.3f}')
                 log.warning(f"LASTSTEP CHANGE. Science exposure {exp} "
                             + f"with speed={speed:.4f} less than threshold "
                             + f"speed={threshold_speed:.4f}. "
                             + f"Processing through sky subtraction.")
 
+    for key in _ARRAY_COLUMNS:
+        if key in outdict:
+            outdict[key] = np.array(outdict[key], dtype=str)
+
     log.info(f'Done summarizing exposure: {exp}')
     return outdict
 
+def summarize_night(raw_data_dir, night, exps=None, obstypes=None, colnames=None, coldefaults=None,
+                    verbosely=False, max_workers=1):
+    """
+    Runs summarize_exposure on all of the given exposures of a night, optionally using a pool of threads.
+    Threads only overlap the parts of the work that release the GIL, such as opening and reading the
+    request json files and directory listings; the fitsio header reads hold the GIL and still run one at
+    a time. Log messages from different exposures interleave when more than one thread is used, so the
+    default is to run serially.
+
+    Args:
+        raw_data_dir, str. The path to where the raw data is stored. It should be the upper level directory where the
+            nightly subdirectories reside.
+        night, str or int. Used to know what nightly subdirectory to look for the given exposures in.
+        exps, list or np.array of str's or int's. The exposure numbers of interest. If None, all entries
+            in the nightly subdirectory are used.
+        obstypes, list or np.array of str's. See summarize_exposure().
+        colnames, list or np.array. See summarize_exposure().
+        coldefaults, list or np.array. See summarize_exposure().
+        verbosely, bool. Whether to print more detailed output (True) or more succinct output (False).
+        max_workers, int. The maximum number of threads to use. Default is 1, which runs serially in the calling thread.
+
+    Returns:
+        list: The outputs of summarize_exposure for each exposure, in the same order as exps.
+    """
+    if exps is None:
+        exps = listpath(raw_data_dir, str(night))
+    if len(exps) == 0:
+        return []
+
+    ## Resolve the default obstypes once here rather than in every thread
+    if obstypes is None:
+        obstypes = default_obstypes_for_exptable()
+
+    summarize = partial(summarize_exposure, raw_data_dir, night, obstypes=obstypes, colnames=colnames,
+                        coldefaults=coldefaults, verbosely=verbosely)
+    if max_workers is None or max_workers <= 1:
+        return [summarize(exp) for exp in exps]
+
+    max_workers = min(max_workers, len(exps))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(summarize, exps))
+
 def airfac_to_airmass(airfac, k=0.114):
     """
     Transforms an "AIRFAC" term of survey speed to airmass:
@@ -152,13 +152,11 @@ def get_tables(night, check_on_disk=False, exptab_colnames=None):
             zfild_expid = str(expid).zfill(8)
             filename = rawdatatemplate.format(zexpid=zfild_expid)
             h1 = fits.getheader(filename, 1)
-            header_info = {keyword: 'unknown' for keyword in
+            ## Single lookup per keyword rather than a keys() membership test followed by indexing
+            header_info = {keyword: h1.get(keyword, 'unknown') for keyword in
                            ['SPCGRPHS', 'EXPTIME',
-                            'FA_SURV', 'FAPRGRM'
-                                       'OBSTYPE', 'TILEID']}
-            for keyword in header_info.keys():
-                if keyword in h1.keys():
-                    header_info[keyword] = h1[keyword]
+                            'FA_SURV', 'FAPRGRM',
+                            'OBSTYPE', 'TILEID']}
 
             if header_info['OBSTYPE'] in default_obstypes:
                 header_info['EXPID'] = expid
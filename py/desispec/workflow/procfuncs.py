@@ -10,7 +10,8 @@ from astropy.table import Table, join
 import numpy as np
 
 import time, datetime
-from collections import OrderedDict
+from collections import Counter
+from functools import lru_cache
 import subprocess
 from copy import deepcopy
 
@@ -18,14 +19,14 @@ from desispec.scripts.tile_redshifts import generate_tile_redshift_scripts
 from desispec.workflow.redshifts import get_ztile_script_pathname, \
                                         get_ztile_relpath, \
                                         get_ztile_script_suffix
-from desispec.workflow.queue import get_resubmission_states, update_from_queue, queue_info_from_qids
+from desispec.workflow.queue import get_resubmission_states, get_termination_states, update_from_queue, \
+                                    queue_info_from_qids
 from desispec.workflow.timing import what_night_is_it
 from desispec.workflow.desi_proc_funcs import get_desi_proc_batch_file_pathname, \
                                               create_desi_proc_batch_script, \
-                                              get_desi_proc_batch_file_path, \
                                               get_desi_proc_tilenight_batch_file_pathname, \
                                               create_desi_proc_tilenight_batch_script
-from desispec.workflow.utils import pathjoin, sleep_and_report
+from desispec.workflow.utils import sleep_and_report
 from desispec.workflow.tableio import write_table
 from desispec.workflow.proctable import table_row_to_dict
 from desiutil.log import get_logger
@@ -35,6 +36,13 @@ from desispec.io.util import decode_camword, create_camword, \
     difference_camwords, \
     camword_to_spectros, camword_union, camword_intersection, parse_badamps
 
+log = get_logger()
+
+## Maps the accepted joint fit descriptors, including the exposure obstypes, to the joint fit job they describe
+_JOINT_FIT_DESCRIPTORS = {'arc': 'psfnight', 'psfnight': 'psfnight',
+                          'flat': 'nightlyflat', 'nightlyflat': 'nightlyflat',
+                          'science': 'science', 'stdstarfit': 'stdstarfit'}
+
 
 #################################################
 ############## Misc Functions ###################
@@ -75,13 +83,38 @@ def batch_script_name(prow):
         str: The complete pathname to the script file, as it is defined within the desi_proc ecosystem.
     """
     expids = prow['EXPID']
+    ## Only the first exposure id enters the script name
     if len(expids) == 0:
-        expids = None
-    if prow['JOBDESC'] == 'tilenight':
-        pathname = get_desi_proc_tilenight_batch_file_pathname(night = prow['NIGHT'], tileid=prow['TILEID'])
+        first_expid = None
+    else:
+        first_expid = int(expids[0])
+    ## The production directory is passed in so that the cached names follow changes to the environment
+    return _batch_script_name(night=int(prow['NIGHT']), first_expid=first_expid, jobdesc=str(prow['JOBDESC']),
+                              camword=str(prow['PROCCAMWORD']), tileid=int(prow['TILEID']),
+                              reduxdir=specprod_root())
+
+@lru_cache(maxsize=4096)
+def _batch_script_name(night, first_expid, jobdesc, camword, tileid, reduxdir):
+    """
+    Cached implementation of batch_script_name. The same job's script name is requested when the script is
+    created, when it is submitted, and on every resubmission, and parsing the camword each time isn't free.
+
+    Args:
+        night (int): The night of the job.
+        first_expid (int or None): The first exposure id of the job, or None if it has no exposures.
+        jobdesc (str): The job description, e.g. 'arc' or 'tilenight'.
+        camword (str): The camword of the cameras processed by the job.
+        tileid (int): The tile id, only used for tilenight jobs.
+        reduxdir (str): The production directory in which the run/scripts directory lives.
+
+    Returns:
+        str: The complete pathname to the script file, as it is defined within the desi_proc ecosystem.
+    """
+    if jobdesc == 'tilenight':
+        pathname = get_desi_proc_tilenight_batch_file_pathname(night=night, tileid=tileid, reduxdir=reduxdir)
     else:
-        pathname = get_desi_proc_batch_file_pathname(night = prow['NIGHT'], exp=expids, \
-                                             jobdesc=prow['JOBDESC'], cameras=prow['PROCCAMWORD'])
+        pathname = get_desi_proc_batch_file_pathname(night=night, exp=first_expid, jobdesc=jobdesc,
+                                                     cameras=camword, reduxdir=reduxdir)
     scriptfile =  pathname + '.slurm'
     return scriptfile
 
@@ -99,7 +132,6 @@ def check_for_outputs_on_disk(prow, resubmit_partial_complete=True):
         the change in job status after creating and submitting the job for processing.
     """
     prow['STATUS'] = 'UNKNOWN'
-    log = get_logger()
 
     job_to_file_map = {
             'prestdstar': 'sframe',
@@ -141,7 +173,7 @@ def check_for_outputs_on_disk(prow, resubmit_partial_complete=True):
                 existing_spectros.append(spectro)
         completed = (len(existing_spectros) == n_desired)
         if not completed and resubmit_partial_complete and len(existing_spectros) > 0:
-            existing_camword = 'a' + ''.join([str(spec) for spec in sorted(existing_spectros)])
+            existing_camword = 'a' + ''.join(map(str, sorted(existing_spectros)))
             prow['PROCCAMWORD'] = difference_camwords(prow['PROCCAMWORD'],existing_camword)
     elif prow['JOBDESC'] in ['cumulative','pernight-v0','pernight','perexp']:
         ## Spectrograph based
@@ -159,7 +191,7 @@ def check_for_outputs_on_disk(prow, resubmit_partial_complete=True):
                 existing_spectros.append(spectro)
         completed = (len(existing_spectros) == n_desired)
         if not completed and resubmit_partial_complete and len(existing_spectros) > 0:
-            existing_camword = 'a' + ''.join([str(spec) for spec in sorted(existing_spectros)])
+            existing_camword = 'a' + ''.join(map(str, sorted(existing_spectros)))
             prow['PROCCAMWORD'] = difference_camwords(prow['PROCCAMWORD'],existing_camword)
     else:
         ## Otheriwse camera based
@@ -313,7 +345,8 @@ def desi_proc_joint_fit_command(prow, queue=None):
 
     night = prow['NIGHT']
     specs = str(prow['PROCCAMWORD'])
-    expid_str = ','.join([str(eid) for eid in prow['EXPID']])
+    ## tolist converts to native ints in one pass, avoiding numpy scalar str() per element
+    expid_str = ','.join(map(str, np.asarray(prow['EXPID']).tolist()))
 
     cmd += f' --obstype {descriptor}'
     cmd += f' --cameras={specs} -n {night}'
@@ -348,7 +381,6 @@ def create_batch_script(prow, queue='realtime', dry_run=0, joint=False, system_n
         input object in memory may or may not be changed. As of writing, a row from a table given to this function will
         not change during the execution of this function (but can be overwritten explicitly with the returned row if desired).
     """
-    log = get_logger()
     if prow['JOBDESC'] in ['perexp','pernight','pernight-v0','cumulative']:
         if dry_run > 1:
             scriptpathname = get_ztile_script_pathname(tileid=prow['TILEID'],group=prow['JOBDESC'],
@@ -442,9 +474,8 @@ def submit_batch_script(prow, dry_run=0, reservation=None, strictly_successful=F
         input object in memory may or may not be changed. As of writing, a row from a table given to this function will
         not change during the execution of this function (but can be overwritten explicitly with the returned row if desired).
     """
-    log = get_logger()
     dep_qids = prow['LATEST_DEP_QID']
-    dep_list, dep_str = '', ''
+    dep_str = ''
 
     # workaround for sbatch --dependency bug not tracking completed jobs correctly
     # see NERSC TICKET INC0203024
@@ -466,22 +497,7 @@ def submit_batch_script(prow, dry_run=0, reservation=None, strictly_successful=F
             ## if 'flat','nightlyflat','poststdstar', or any type of redshift, require strict success of inputs
             depcond = 'afterok'
 
-        dep_str = f'--dependency={depcond}:'
-
-        if np.isscalar(dep_qids):
-            dep_list = str(dep_qids).strip(' \t')
-            if dep_list == '':
-                dep_str = ''
-            else:
-                dep_str += dep_list
-        else:
-            if len(dep_qids)>1:
-                dep_list = ':'.join(np.array(dep_qids).astype(str))
-                dep_str += dep_list
-            elif len(dep_qids) == 1 and dep_qids[0] not in [None, 0]:
-                dep_str += str(dep_qids[0])
-            else:
-                dep_str = ''
+        dep_str = _dependency_string(dep_qids, depcond)
 
     # script = f'{jobname}.slurm'
     # script_path = pathjoin(batchdir, script)
@@ -490,33 +506,36 @@ def submit_batch_script(prow, dry_run=0, reservation=None, strictly_successful=F
                                                         night=prow['NIGHT'], expid=np.min(prow['EXPID']))
         jobname = os.path.split(script_path)[-1]
     else:
-        batchdir = get_desi_proc_batch_file_path(night=prow['NIGHT'])
+        ## batch_script_name already gives the full pathname within the default batch directory
         jobname = batch_script_name(prow)
-        script_path = pathjoin(batchdir, jobname)
+        script_path = jobname
 
     batch_params = ['sbatch', '--parsable']
     if dep_str != '':
-        batch_params.append(f'{dep_str}')
+        batch_params.append(dep_str)
     if reservation is not None:
         batch_params.append(f'--reservation={reservation}')
-    batch_params.append(f'{script_path}')
+    batch_params.append(script_path)
 
     if dry_run:
-        ## in dry_run, mock Slurm ID's are generated using CPU seconds. Wait one second so we have unique ID's
-        current_qid = int(time.time() - 1.6e9)
-        time.sleep(1)
+        ## in dry_run, mock Slurm ID's are generated using nanoseconds since 2020-09-13 (1.6e9 s), so they are unique
+        ## both between submissions and between dry run processes without waiting in between
+        current_qid = time.time_ns() - 1_600_000_000_000_000_000
     else:
         #- sbatch sometimes fails; try several times before giving up
         max_attempts = 3
         for attempt in range(max_attempts):
             try:
-                current_qid = subprocess.check_output(batch_params, stderr=subprocess.STDOUT, text=True)
-                current_qid = int(current_qid.strip(' \t\n'))
+                ## --parsable output is just the ID, so parse the raw bytes and only decode the output on failure.
+                ## stderr is kept separate so that scheduler warnings can't corrupt the returned ID
+                current_qid = subprocess.check_output(batch_params, stderr=subprocess.PIPE)
+                current_qid = int(current_qid.strip(b' \t\n'))
                 break
             except subprocess.CalledProcessError as err:
                 log.error(f'{jobname} submission failure at {datetime.datetime.now()}')
                 log.error(f'{jobname}   {batch_params}')
-                log.error(f'{jobname}   {err.output=}')
+                log.error(f'{jobname}   err.output={err.output.decode(errors="replace")!r}')
+                log.error(f'{jobname}   err.stderr={err.stderr.decode(errors="replace")!r}')
                 if attempt < max_attempts - 1:
                     log.info('Sleeping 60 seconds then retrying')
                     time.sleep(60)
@@ -535,6 +554,27 @@ def submit_batch_script(prow, dry_run=0, reservation=None, strictly_successful=F
 
     return prow
 
+def _dependency_string(dep_qids, depcond):
+    """
+    Builds the sbatch dependency argument for the given Slurm job ID's.
+
+    Args:
+        dep_qids, int, str, or list/array of ints. The Slurm job ID's that the job depends on. Entries
+            of a list/array that are None or 0 are dropped.
+        depcond, str. The Slurm dependency condition, e.g. 'afterok' or 'afterany'.
+
+    Returns:
+        str: The '--dependency=' argument for sbatch, or an empty string if no dependencies remain.
+    """
+    ## Join the qids directly rather than casting them through intermediate numpy arrays
+    if np.isscalar(dep_qids):
+        dep_list = str(dep_qids).strip(' \t')
+    else:
+        dep_list = ':'.join([str(qid) for qid in dep_qids if qid not in (None, 0)])
+    if dep_list == '':
+        return ''
+    return f'--dependency={depcond}:{dep_list}'
+
 
 #############################################
 ##########   Row Manipulations   ############
@@ -629,10 +669,10 @@ def assign_dependency(prow, dependency):
         input object in memory may or may not be changed. As of writing, a row from a table given to this function will
         not change during the execution of this function (but can be overwritten explicitly with the returned row if desired).
     """
-    prow['INT_DEP_IDS'] = np.ndarray(shape=0).astype(int)
-    prow['LATEST_DEP_QID'] = np.ndarray(shape=0).astype(int)
+    prow['INT_DEP_IDS'] = np.empty(0, dtype=int)
+    prow['LATEST_DEP_QID'] = np.empty(0, dtype=int)
     if dependency is not None:
-        if type(dependency) in [list, np.array]:
+        if isinstance(dependency, (list, tuple, np.ndarray)):
             ids, qids = [], []
             for curdep in dependency:
                 if still_a_dependency(curdep):
@@ -640,7 +680,7 @@ def assign_dependency(prow, dependency):
                     qids.append(curdep['LATEST_QID'])
             prow['INT_DEP_IDS'] = np.array(ids, dtype=int)
             prow['LATEST_DEP_QID'] = np.array(qids, dtype=int)
-        elif type(dependency) in [dict, OrderedDict, Table.Row] and still_a_dependency(dependency):
+        elif isinstance(dependency, (dict, Table.Row)) and still_a_dependency(dependency):
             prow['INT_DEP_IDS'] = np.array([dependency['INTID']], dtype=int)
             prow['LATEST_DEP_QID'] = np.array([dependency['LATEST_QID']], dtype=int)
     return prow
@@ -713,7 +753,6 @@ def parse_previous_tables(etable, ptable, night):
         * internal_id, int, an internal identifier unique to each job. Increments with each new job. This
           is the latest unassigned value.
     """
-    log = get_logger()
     arcs, flats, sciences = [], [], []
     calibjobs = {'nightlybias': None, 'ccdcalib': None, 'badcol': None, 'psfnight': None,
                  'nightlyflat': None}
@@ -724,24 +763,40 @@ def parse_previous_tables(etable, ptable, night):
         prow = ptable[-1]
         internal_id = int(prow['INTID'])+1
         lasttype,lasttile = get_type_and_tile(ptable[-1])
-        jobtypes = ptable['JOBDESC']
 
-        if 'nightlybias' in jobtypes:
-            calibjobs['nightlybias'] = table_row_to_dict(ptable[jobtypes=='nightlybias'][0])
+        ## Index the first job of each type and the first exposure table row of each EXPID once, rather
+        ## than scanning the full columns for every lookup below
+        first_of_jobtype = {}
+        for rown, jobtype in enumerate(np.asarray(ptable['JOBDESC']).astype(str)):
+            first_of_jobtype.setdefault(jobtype, rown)
+        expid_to_erow = {}
+        for erown, expid in enumerate(np.asarray(etable['EXPID']).tolist()):
+            expid_to_erow.setdefault(expid, erown)
+        reversed_rows = range(len(ptable)-1, -1, -1)
+
+        if 'nightlybias' in first_of_jobtype:
+            calibjobs['nightlybias'] = table_row_to_dict(ptable[first_of_jobtype['nightlybias']])
             log.info("Located nightlybias job in exposure table: {}".format(calibjobs['nightlybias']))
 
-        if 'ccdcalib' in jobtypes:
-            calibjobs['ccdcalib'] = table_row_to_dict(ptable[jobtypes=='ccdcalib'][0])
+        if 'ccdcalib' in first_of_jobtype:
+            calibjobs['ccdcalib'] = table_row_to_dict(ptable[first_of_jobtype['ccdcalib']])
             log.info("Located ccdcalib job in exposure table: {}".format(calibjobs['ccdcalib']))
 
-        if 'psfnight' in jobtypes:
-            calibjobs['psfnight'] = table_row_to_dict(ptable[jobtypes=='psfnight'][0])
+        if 'psfnight' in first_of_jobtype:
+            calibjobs['psfnight'] = table_row_to_dict(ptable[first_of_jobtype['psfnight']])
             log.info("Located joint fit psfnight job in exposure table: {}".format(calibjobs['psfnight']))
         elif lasttype == 'arc':
             seqnum = 10
-            for row in ptable[::-1]:
-                erow = etable[etable['EXPID']==row['EXPID'][0]]
-                if row['OBSTYPE'].lower() == 'arc' and int(erow['SEQNUM'])<seqnum:
+            for rown in reversed_rows:
+                row = ptable[rown]
+                ## Only look up the exposure for arc jobs, and stop at any job whose exposure isn't in the etable
+                if row['OBSTYPE'].lower() != 'arc':
+                    break
+                erown = expid_to_erow.get(int(row['EXPID'][0]))
+                if erown is None:
+                    break
+                erow = etable[erown]
+                if int(erow['SEQNUM'])<seqnum:
                     arcs.append(table_row_to_dict(row))
                     seqnum = int(erow['SEQNUM'])
                 else:
@@ -749,13 +804,19 @@ def parse_previous_tables(etable, ptable, night):
             ## Because we work backword to fill in, we need to reverse them to get chronological order back
             arcs = arcs[::-1]
 
-        if 'nightlyflat' in jobtypes:
-            calibjobs['nightlyflat'] = table_row_to_dict(ptable[jobtypes=='nightlyflat'][0])
+        if 'nightlyflat' in first_of_jobtype:
+            calibjobs['nightlyflat'] = table_row_to_dict(ptable[first_of_jobtype['nightlyflat']])
             log.info("Located joint fit nightlyflat job in exposure table: {}".format(calibjobs['nightlyflat']))
         elif lasttype == 'flat':
-            for row in ptable[::-1]:
-                erow = etable[etable['EXPID']==row['EXPID'][0]]
-                if row['OBSTYPE'].lower() == 'flat' and int(erow['SEQTOT']) < 5:
+            for rown in reversed_rows:
+                row = ptable[rown]
+                if row['OBSTYPE'].lower() != 'flat':
+                    break
+                erown = expid_to_erow.get(int(row['EXPID'][0]))
+                if erown is None:
+                    break
+                erow = etable[erown]
+                if int(erow['SEQTOT']) < 5:
                     if float(erow['EXPTIME']) > 100.:
                         flats.append(table_row_to_dict(row))
                 else:
@@ -763,7 +824,8 @@ def parse_previous_tables(etable, ptable, night):
             flats = flats[::-1]
 
         if lasttype.lower() == 'science':
-            for row in ptable[::-1]:
+            for rown in reversed_rows:
+                row = ptable[rown]
                 if row['OBSTYPE'].lower() == 'science' and row['TILEID'] == lasttile and \
                    row['JOBDESC'] == 'prestdstar' and row['LASTSTEP'] != 'skysub':
                     sciences.append(table_row_to_dict(row))
@@ -781,7 +843,7 @@ def parse_previous_tables(etable, ptable, night):
 
 
 def update_and_recurvsively_submit(proc_table, submits=0, resubmission_states=None,
-                                   ptab_name=None, dry_run=0,reservation=None):
+                                   ptab_name=None, dry_run=0,reservation=None, submit_delay=1):
     """
     Given an processing table, this loops over job rows and resubmits failed jobs (as defined by resubmission_states).
     Before submitting a job, it checks the dependencies for failures. If a dependency needs to be resubmitted, it recursively
@@ -799,6 +861,8 @@ def update_and_recurvsively_submit(proc_table, submits=0, resubmission_states=No
             dry_run=2, the scripts will not be writter or submitted. Logging will remain the same
             for testing as though scripts are being submitted. Default is 0 (false).
         reservation: str. The reservation to submit jobs to. If None, it is not submitted to a reservation.
+        submit_delay: int or float. Number of seconds to wait after each submission so that the scheduler isn't
+            flooded with requests. Not applied in dry runs. Default is 1.
 
     Returns:
         tuple: A tuple containing:
@@ -811,7 +875,6 @@ def update_and_recurvsively_submit(proc_table, submits=0, resubmission_states=No
     Note:
         This modifies the inputs of both proc_table and submits and returns them.
     """
-    log = get_logger()
     if resubmission_states is None:
         resubmission_states = get_resubmission_states()
     log.info(f"Resubmitting jobs with current states in the following: {resubmission_states}")
@@ -823,17 +886,27 @@ def update_and_recurvsively_submit(proc_table, submits=0, resubmission_states=No
     for row in proc_table:
         print(np.array(row[cols]))
     print("\n")
-    id_to_row_map = {row['INTID']: rown for rown, row in enumerate(proc_table)}
-    for rown in range(len(proc_table)):
-        if proc_table['STATUS'][rown] in resubmission_states:
-            proc_table, submits = recursive_submit_failed(rown, proc_table, submits,
-                                                          id_to_row_map, ptab_name,
-                                                          resubmission_states,
-                                                          reservation, dry_run)
+    id_to_row_map = dict(zip(np.asarray(proc_table['INTID']).tolist(), range(len(proc_table))))
+    ## Walk forward through the table, finding the next row to resubmit with a vectorized scan of the
+    ## remaining rows. The scan is redone after every resubmission since resubmitting a row can also
+    ## resubmit its dependencies and the periodic queue refresh can move later rows into a resubmission state
+    resub_states = np.asarray(list(resubmission_states), dtype=str)
+    rown = -1
+    while True:
+        statuses = np.asarray(proc_table['STATUS'][rown+1:]).astype(str)
+        pending = np.flatnonzero(np.isin(statuses, resub_states))
+        if len(pending) == 0:
+            break
+        rown += 1 + int(pending[0])
+        proc_table, submits = recursive_submit_failed(rown, proc_table, submits,
+                                                      id_to_row_map, ptab_name,
+                                                      resubmission_states,
+                                                      reservation, dry_run,
+                                                      submit_delay=submit_delay)
     return proc_table, submits
 
 def recursive_submit_failed(rown, proc_table, submits, id_to_row_map, ptab_name=None,
-                            resubmission_states=None, reservation=None, dry_run=0):
+                            resubmission_states=None, reservation=None, dry_run=0, submit_delay=1):
     """
     Given a row of a processing table and the full processing table, this resubmits the given job.
     Before submitting a job, it checks the dependencies for failures in the processing table. If a dependency needs to
@@ -854,6 +927,8 @@ def recursive_submit_failed(rown, proc_table, submits, id_to_row_map, ptab_name=
         dry_run, int, If nonzero, this is a simulated run. If dry_run=1 the scripts will be written or submitted. If
             dry_run=2, the scripts will not be writter or submitted. Logging will remain the same
             for testing as though scripts are being submitted. Default is 0 (false).
+        submit_delay: int or float. Number of seconds to wait after each submission so that the scheduler isn't
+            flooded with requests. Not applied in dry runs. Default is 1.
 
     Returns:
         tuple: A tuple containing:
@@ -866,7 +941,6 @@ def recursive_submit_failed(rown, proc_table, submits, id_to_row_map, ptab_name=
     Note:
         This modifies the inputs of both proc_table and submits and returns them.
     """
-    log = get_logger()
     row = proc_table[rown]
     log.info(f"Identified row {row['INTID']} as needing resubmission.")
     log.info(f"{row['INTID']}: Expid(s): {row['EXPID']}  Job: {row['JOBDESC']}")
@@ -874,29 +948,39 @@ def recursive_submit_failed(rown, proc_table, submits, id_to_row_map, ptab_name=
         resubmission_states = get_resubmission_states()
     ideps = proc_table['INT_DEP_IDS'][rown]
     if ideps is None:
-        proc_table['LATEST_DEP_QID'][rown] = np.ndarray(shape=0).astype(int)
+        proc_table['LATEST_DEP_QID'][rown] = np.empty(0, dtype=int)
     else:
         all_valid_states = list(resubmission_states.copy())
         all_valid_states.extend(['RUNNING','PENDING','SUBMITTED','COMPLETED'])
-        for idep in np.sort(np.atleast_1d(ideps)):
-            if proc_table['STATUS'][id_to_row_map[idep]] not in all_valid_states:
-                log.warning(f"Proc INTID: {proc_table['INTID'][rown]} depended on" +
-                            f" INTID {proc_table['INTID'][id_to_row_map[idep]]}" +
-                            f" but that exposure has state" +
-                            f" {proc_table['STATUS'][id_to_row_map[idep]]} that" +
-                            f" isn't in the list of resubmission states." +
-                            f" Exiting this job's resubmission attempt.")
-                proc_table['STATUS'][rown] = "DEP_NOT_SUBD"
-                return proc_table, submits
+        ## Dependencies are almost always a single or already ordered ID, so only sort when actually needed
+        ideps = np.atleast_1d(ideps)
+        if len(ideps) > 1 and np.any(ideps[1:] < ideps[:-1]):
+            ideps = np.sort(ideps)
+        ## Resolve the dependency rows once and check all of their states in a single vectorized pass
+        dep_rows = np.array([id_to_row_map[idep] for idep in ideps], dtype=int)
+        dep_states = np.asarray(proc_table['STATUS'][dep_rows]).astype(str)
+        invalid = np.flatnonzero(~np.isin(dep_states, all_valid_states))
+        if len(invalid) > 0:
+            deprow = dep_rows[invalid[0]]
+            log.warning(f"Proc INTID: {proc_table['INTID'][rown]} depended on" +
+                        f" INTID {proc_table['INTID'][deprow]}" +
+                        f" but that exposure has state" +
+                        f" {proc_table['STATUS'][deprow]} that" +
+                        f" isn't in the list of resubmission states." +
+                        f" Exiting this job's resubmission attempt.")
+            proc_table['STATUS'][rown] = "DEP_NOT_SUBD"
+            return proc_table, submits
         qdeps = []
-        for idep in np.sort(np.atleast_1d(ideps)):
-            if proc_table['STATUS'][id_to_row_map[idep]] in resubmission_states:
-                proc_table, submits = recursive_submit_failed(id_to_row_map[idep],
+        for deprow in dep_rows:
+            ## Status is re-read per dependency since earlier recursive resubmissions may have updated it
+            if proc_table['STATUS'][deprow] in resubmission_states:
+                proc_table, submits = recursive_submit_failed(deprow,
                                                               proc_table, submits,
                                                               id_to_row_map,
                                                               reservation=reservation,
-                                                              dry_run=dry_run)
-            qdeps.append(proc_table['LATEST_QID'][id_to_row_map[idep]])
+                                                              dry_run=dry_run,
+                                                              submit_delay=submit_delay)
+            qdeps.append(proc_table['LATEST_QID'][deprow])
 
         qdeps = np.atleast_1d(qdeps)
         if len(qdeps) > 0:
@@ -908,8 +992,11 @@ def recursive_submit_failed(rown, proc_table, submits, id_to_row_map, ptab_name=
                                            strictly_successful=True, dry_run=dry_run)
     submits += 1
 
+    ## Short configurable pause after every submission so the scheduler isn't flooded, with the longer
+    ## pauses for writing to disk and refreshing from the queue only once per batch of submissions
     if not dry_run:
-        sleep_and_report(1, message_suffix=f"after submitting job to queue")
+        if submit_delay > 0:
+            sleep_and_report(submit_delay, message_suffix=f"after submitting job to queue")
         if submits % 10 == 0:
             if ptab_name is None:
                 write_table(proc_table, tabletype='processing', overwrite=True)
@@ -917,7 +1004,13 @@ def recursive_submit_failed(rown, proc_table, submits, id_to_row_map, ptab_name=
                 write_table(proc_table, tablename=ptab_name, overwrite=True)
             sleep_and_report(2, message_suffix=f"after writing to disk")
         if submits % 100 == 0:
-            proc_table = update_from_queue(proc_table)
+            ## Jobs already in a terminal state can't change under the same QID, so only query Slurm
+            ## for the rest of the table rather than every job ever submitted
+            statuses = np.asarray(proc_table['STATUS']).astype(str)
+            qids = np.asarray(proc_table['LATEST_QID'])
+            qids = qids[(qids > 0) & ~np.isin(statuses, get_termination_states())]
+            if len(qids) > 0:
+                proc_table = update_from_queue(proc_table, qtable=queue_info_from_qids(qids))
             if ptab_name is None:
                 write_table(proc_table, tabletype='processing', overwrite=True)
             else:
@@ -972,22 +1065,16 @@ def joint_fit(ptable, prows, internal_id, queue, reservation, descriptor, z_subm
         * joint_prow, dict. Row of a processing table corresponding to the joint fit job.
         * internal_id, int, the next internal id to be used for assignment (already incremented up from the last used id number used).
     """
-    log = get_logger()
     if len(prows) < 1:
         return ptable, None, internal_id
 
     if descriptor is None:
         return ptable, None
-    elif descriptor == 'arc':
-        descriptor = 'psfnight'
-    elif descriptor == 'flat':
-        descriptor = 'nightlyflat'
-    elif descriptor == 'science':
-        if z_submit_types is None or len(z_submit_types) == 0:
-            descriptor = 'stdstarfit'
-
-    if descriptor not in ['psfnight', 'nightlyflat', 'science','stdstarfit']:
+    descriptor = _JOINT_FIT_DESCRIPTORS.get(descriptor)
+    if descriptor is None:
         return ptable, None, internal_id
+    elif descriptor == 'science' and (z_submit_types is None or len(z_submit_types) == 0):
+        descriptor = 'stdstarfit'
 
     log.info(" ")
     log.info(f"Joint fit criteria found. Running {descriptor}.\n")
@@ -1024,7 +1111,7 @@ def joint_fit(ptable, prows, internal_id, queue, reservation, descriptor, z_subm
 
             row['INTID'] = internal_id
             internal_id += 1
-            row['ALL_QIDS'] = np.ndarray(shape=0).astype(int)
+            row['ALL_QIDS'] = np.empty(0, dtype=int)
             row = assign_dependency(row, joint_prow)
             row = create_and_submit(row, queue=queue, reservation=reservation, dry_run=dry_run,
                                     strictly_successful=strictly_successful, check_for_outputs=check_for_outputs,
@@ -1117,7 +1204,6 @@ def submit_redshifts(ptable, prows, tnight, internal_id, queue, reservation,
         * ptable, Table. The same processing table as input except with added rows for the joint fit job.
         * internal_id, int, the next internal id to be used for assignment (already incremented up from the last used id number used).
     """
-    log = get_logger()
     if len(prows) < 1 or z_submit_types == None:
         return ptable, internal_id
 
@@ -1197,7 +1283,6 @@ def submit_tilenight(ptable, prows, calibjobs, internal_id, queue, reservation,
         * tnight_prow, dict. Row of a processing table corresponding to the tilenight job.
         * internal_id, int, the next internal id to be used for assignment (already incremented up from the last used id number used).
     """
-    log = get_logger()
     if len(prows) < 1:
         return ptable, None, internal_id
 
@@ -1290,7 +1375,7 @@ def make_joint_prow(prows, descriptor, internal_id):
     joint_prow['INTID'] = internal_id
     joint_prow['JOBDESC'] = descriptor
     joint_prow['LATEST_QID'] = -99
-    joint_prow['ALL_QIDS'] = np.ndarray(shape=0).astype(int)
+    joint_prow['ALL_QIDS'] = np.empty(0, dtype=int)
     joint_prow['SUBMIT_DATE'] = -99
     joint_prow['STATUS'] = 'U'
     joint_prow['SCRIPTNAME'] = ''
@@ -1363,7 +1448,7 @@ def make_tnight_prow(prows, calibjobs, internal_id):
     joint_prow['INTID'] = internal_id
     joint_prow['JOBDESC'] = 'tilenight'
     joint_prow['LATEST_QID'] = -99
-    joint_prow['ALL_QIDS'] = np.ndarray(shape=0).astype(int)
+    joint_prow['ALL_QIDS'] = np.empty(0, dtype=int)
     joint_prow['SUBMIT_DATE'] = -99
     joint_prow['STATUS'] = 'U'
     joint_prow['SCRIPTNAME'] = ''
@@ -1394,7 +1479,7 @@ def make_redshift_prow(prows, tnight, descriptor, internal_id):
     redshift_prow['INTID'] = internal_id
     redshift_prow['JOBDESC'] = descriptor
     redshift_prow['LATEST_QID'] = -99
-    redshift_prow['ALL_QIDS'] = np.ndarray(shape=0).astype(int)
+    redshift_prow['ALL_QIDS'] = np.empty(0, dtype=int)
     redshift_prow['SUBMIT_DATE'] = -99
     redshift_prow['STATUS'] = 'U'
     redshift_prow['SCRIPTNAME'] = ''
@@ -1464,7 +1549,6 @@ def checkfor_and_submit_joint_job(ptable, arcs, flats, sciences, calibjobs,
           from the input such that it represents the smallest unused ID.
     """
     if lasttype == 'science' and len(sciences) > 0:
-        log = get_logger()
         skysubonly = np.array([sci['LASTSTEP'] == 'skysub' for sci in sciences])
         if np.all(skysubonly):
             log.error("Identified all exposures in joint fitting request as skysub-only. Not submitting")
@@ -1480,7 +1564,6 @@ def checkfor_and_submit_joint_job(ptable, arcs, flats, sciences, calibjobs,
             log.info("Expid's: {}".format([row['EXPID'] for row in sciences]))
             log.info("LASTSTEP's: {}".format([row['LASTSTEP'] for row in sciences]))
 
-        from collections import Counter
         tiles = np.array([sci['TILEID'] for sci in sciences])
         counts = Counter(tiles)
         if len(counts.most_common()) > 1:
@@ -1612,6 +1695,7 @@ def set_calibrator_flag(prows, ptable):
         Table: The same processing table as input except with added rows for the joint fit job and, in the case
         of a stdstarfit, the poststdstar science exposure jobs.
     """
-    for prow in prows:
-        ptable['CALIBRATOR'][ptable['INTID'] == prow['INTID']] = 1
+    ## Flag all of the input jobs in one pass over the INTID column rather than one pass per input row
+    intids = np.array([prow['INTID'] for prow in prows], dtype=np.asarray(ptable['INTID']).dtype)
+    ptable['CALIBRATOR'][np.isin(ptable['INTID'], intids)] = 1
     return ptable
@@ -305,9 +305,6 @@ def erow_to_prow(erow):#, colnames=None, coldtypes=None, coldefaults=None, joins
     ## Define the column names for the exposure table and their respective datatypes
     #if colnames is None:
     colnames, coldtypes, coldefaults = get_processing_table_column_defs(return_default_values=True)
-    colnames, coldtypes, coldefaults = np.array(colnames,dtype=object), \
-                                       np.array(coldtypes,dtype=object), \
-                                       np.array(coldefaults,dtype=object)
 
     prow = dict()
     for nam, typ, defval in zip(colnames, coldtypes, coldefaults):
@@ -318,10 +315,7 @@ def erow_to_prow(erow):#, colnames=None, coldtypes=None, coldefaults=None, joins
                 badcamword = ''
             prow[nam] = difference_camwords(erow['CAMWORD'],badcamword)
         elif nam == 'OBSDESC':
-            if nam in colnames:
-                prow[nam] = coldefaults[colnames == nam][0]
-            else:
-                prow[nam] = ''
+            prow[nam] = defval
             for word in ['dither', 'acquisition', 'focus', 'test']:
                 if 'PROGRAM' in row_names and word in erow['PROGRAM'].lower():
                     prow[nam] = word
@@ -362,8 +356,6 @@ def default_prow():
     #if colnames is None:
     colnames, coldtypes, coldefaults \
         = get_processing_table_column_defs(return_default_values=True)
-    colnames = np.array(colnames,dtype=object)
-    coldefaults = np.array(coldefaults,dtype=object)
 
     prow = dict()
     for nam, defval in zip(colnames, coldefaults):
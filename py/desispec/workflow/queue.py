@@ -267,10 +267,14 @@ def update_from_queue(ptable, qtable=None, dry_run=0, ignore_scriptnames=False):
     if check_scriptname:
         log.info("Will be verifying that the file names are consistent")
 
+    ## Map each QID to its first row once, rather than comparing every queue entry against the full column
+    qid_to_row = {}
+    for rown, qid in enumerate(np.asarray(ptable['LATEST_QID']).tolist()):
+        qid_to_row.setdefault(qid, rown)
+
     for row in qtable:
-        match = (int(row['JOBID']) == ptable['LATEST_QID'])
-        if np.any(match):
-            ind = np.where(match)[0][0]
+        ind = qid_to_row.get(int(row['JOBID']))
+        if ind is not None:
             if check_scriptname and ptable['SCRIPTNAME'][ind] not in row['JOBNAME']:
                 log.warning(f"For job with expids:{ptable['EXPID'][ind]}"
                             + f" the scriptname is {ptable['SCRIPTNAME'][ind]}"
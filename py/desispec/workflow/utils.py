@@ -9,6 +9,7 @@ import sys
 import numpy as np
 import glob
 import json
+from functools import lru_cache
 
 from desiutil.log import get_logger
 ## Give a shortcut name to os.path.join
@@ -28,13 +29,14 @@ def listpath(*args):
               doesn't exist, it returns an empty list.
     """
     # return np.sort(os.listdir(pathjoin(*args))).tolist()
-    if os.path.exists(pathjoin(*args)):
+    ## Join once and let listdir report a missing location, rather than stat'ing it first
+    try:
         srtlist = sorted(os.listdir(pathjoin(*args)))
-        if '.DS_Store' in srtlist:
-            srtlist.remove('.DS_Store')
-        return srtlist
-    else:
+    except FileNotFoundError:
         return []
+    if '.DS_Store' in srtlist:
+        srtlist.remove('.DS_Store')
+    return srtlist
 
 
 def globpath(*args):
@@ -53,8 +55,9 @@ def globpath(*args):
               any). Ignores Mac file .DS_STORE. If location doesn't exist, it returns an empty list.
     """
     # return np.sort(glob.glob(pathjoin(*args))).tolist()
-    if os.path.exists(pathjoin(*args)):
-        srtlist = sorted(glob.glob(pathjoin(*args)))
+    path = pathjoin(*args)
+    if os.path.exists(path):
+        srtlist = sorted(glob.glob(path))
         if '.DS_Store' in srtlist:
             srtlist.remove('.DS_Store')
         return srtlist
@@ -209,8 +212,20 @@ def get_printable_banner(input_str=None):
     Returns:
         banner: str. A banner comprised of ascii pound symbols (#) and the given string in the center.
     """
-    if type(input_str) is not str:
-        input_str = str(input_str)
+    return _printable_banner(str(input_str))
+
+@lru_cache(maxsize=8)
+def _printable_banner(input_str):
+    """
+    Cached implementation of get_printable_banner. The same night or exposure banner is typically
+    requested repeatedly within a loop, so it only needs to be assembled once.
+
+    Args:
+        input_str: str. The string to be placed inside the banner.
+
+    Returns:
+        banner: str. A banner comprised of ascii pound symbols (#) and the given string in the center.
+    """
     ninput = len(input_str)
     nhash = max(4+ninput, 36)
     nshort1 = (nhash - ninput - 2) // 2